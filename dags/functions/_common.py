@@ -0,0 +1,10 @@
+"""
+Shared helpers for DAG Factory functions.
+"""
+
+from datetime import datetime
+
+
+def _now_iso() -> str:
+    """Timestamp stamped onto task results; single swap point for the clock."""
+    return datetime.now().isoformat()
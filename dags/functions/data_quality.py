@@ -7,11 +7,80 @@ Data quality monitoring, profiling, and reporting.
 import logging
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from pathlib import Path
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+# Mock per-table statistics; nested dicts are shared between tables and must not be mutated
+_PROFILE_TEMPLATE = {
+    'record_count': 15000,
+    'column_count': 12,
+    'null_percentages': {
+        'id': 0.0,
+        'name': 2.1,
+        'email': 1.5,
+        'phone': 8.3,
+        'address': 12.7
+    },
+    'data_types': {
+        'id': 'integer',
+        'name': 'string',
+        'email': 'string',
+        'phone': 'string',
+        'address': 'string'
+    },
+    'unique_counts': {
+        'id': 15000,
+        'email': 14950,
+        'phone': 14200
+    }
+}
+
+# Below this many sources the NumPy import and array setup cost more than the loop
+VECTORIZE_MIN_SOURCES = 32
+
+
+def _score_freshness(ages_hours: List[float], max_ages_hours: List[float]) -> List[Tuple[bool, float]]:
+    """
+    Compute (is_fresh, freshness_score) for each source.
+    
+    Args:
+        ages_hours: Age of each source in hours
+        max_ages_hours: Maximum allowed age of each source in hours
+        
+    Returns:
+        List of (is_fresh, freshness_score) tuples in source order
+    """
+    if len(ages_hours) > VECTORIZE_MIN_SOURCES:
+        import numpy as np
+        
+        ages = np.asarray(ages_hours, dtype=float)
+        max_ages = np.asarray(max_ages_hours, dtype=float)
+        is_fresh = ages <= max_ages
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(is_fresh, 1.0 - ages / max_ages, 0.0)
+        return list(zip(is_fresh.tolist(), scores.tolist()))
+    
+    return [
+        (age <= max_age, 1.0 - (age / max_age) if age <= max_age else 0.0)
+        for age, max_age in zip(ages_hours, max_ages_hours)
+    ]
+
+
+def _serialize_report(report: Dict[str, Any]) -> bytes:
+    """Serialize a quality report to JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(report, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(report).encode('utf-8')
+
+
 def profile_data_quality(profiling_config: Dict[str, Any], **context) -> Dict[str, Any]:
     """
     Profile data quality metrics for monitoring.
@@ -27,36 +96,13 @@ def profile_data_quality(profiling_config: Dict[str, Any], **context) -> Dict[st
     
     execution_date = context['execution_date']
     tables_to_profile = profiling_config.get('tables', [])
+    now_iso = datetime.now().isoformat()
     
-    # Mock data profiling
-    profile_results = {}
-    
-    for table in tables_to_profile:
-        # Mock statistics for each table
-        profile_results[table] = {
-            'record_count': 15000,
-            'column_count': 12,
-            'null_percentages': {
-                'id': 0.0,
-                'name': 2.1,
-                'email': 1.5,
-                'phone': 8.3,
-                'address': 12.7
-            },
-            'data_types': {
-                'id': 'integer',
-                'name': 'string',
-                'email': 'string',
-                'phone': 'string',
-                'address': 'string'
-            },
-            'unique_counts': {
-                'id': 15000,
-                'email': 14950,
-                'phone': 14200
-            },
-            'profiling_time': datetime.now().isoformat()
-        }
+    # Mock statistics for each table
+    profile_results = {
+        table: dict(_PROFILE_TEMPLATE, profiling_time=now_iso)
+        for table in tables_to_profile
+    }
     
     logger.info(f"Profiled {len(tables_to_profile)} tables")
     
@@ -65,7 +111,7 @@ def profile_data_quality(profiling_config: Dict[str, Any], **context) -> Dict[st
         'execution_date': execution_date.isoformat(),
         'tables_profiled': len(tables_to_profile),
         'profile_results': profile_results,
-        'profiling_time': datetime.now().isoformat()
+        'profiling_time': now_iso
     }
 
 
@@ -88,11 +134,13 @@ def monitor_data_drift(drift_config: Dict[str, Any], **context) -> Dict[str, Any
     
     # Mock drift analysis
     drift_results = {}
+    any_drift = False
     
     for column in columns_to_monitor:
         # Mock drift calculation
         drift_score = 0.05  # Mock: 5% drift
         is_drifted = drift_score > drift_threshold
+        any_drift = any_drift or is_drifted
         
         drift_results[column] = {
             'drift_score': drift_score,
@@ -107,8 +155,6 @@ def monitor_data_drift(drift_config: Dict[str, Any], **context) -> Dict[str, Any
         else:
             logger.info(f"No significant drift in {column}: {drift_score} <= {drift_threshold}")
     
-    any_drift = any(result['is_drifted'] for result in drift_results.values())
-    
     return {
         'status': 'success',
         'any_drift_detected': any_drift,
@@ -134,23 +180,30 @@ def assess_data_freshness(freshness_config: Dict[str, Any], **context) -> Dict[s
     sources = freshness_config.get('sources', [])
     execution_date = context['execution_date']
     
+    # Mock freshness assessment: every source was last updated 3 hours ago
+    last_updated = execution_date - timedelta(hours=3)
+    last_updated_iso = last_updated.isoformat()
+    age_hours = (execution_date - last_updated).total_seconds() / 3600
+    
+    ages_hours = [age_hours] * len(sources)
+    max_ages_hours = [source.get('max_age_hours', 24) for source in sources]
+    
+    scores = _score_freshness(ages_hours, max_ages_hours)
     freshness_results = {}
+    overall_fresh = True
+    total_freshness_score = 0.0
     
-    for source in sources:
+    for source, max_age_hours, (is_fresh, freshness_score) in zip(sources, max_ages_hours, scores):
         source_name = source.get('name')
-        max_age_hours = source.get('max_age_hours', 24)
-        
-        # Mock freshness assessment
-        last_updated = execution_date - timedelta(hours=3)  # Mock: 3 hours ago
-        age_hours = (execution_date - last_updated).total_seconds() / 3600
-        is_fresh = age_hours <= max_age_hours
+        overall_fresh = overall_fresh and is_fresh
+        total_freshness_score += freshness_score
         
         freshness_results[source_name] = {
-            'last_updated': last_updated.isoformat(),
+            'last_updated': last_updated_iso,
             'age_hours': age_hours,
             'max_age_hours': max_age_hours,
             'is_fresh': is_fresh,
-            'freshness_score': 1.0 - (age_hours / max_age_hours) if age_hours <= max_age_hours else 0.0
+            'freshness_score': freshness_score
         }
         
         if is_fresh:
@@ -158,8 +211,7 @@ def assess_data_freshness(freshness_config: Dict[str, Any], **context) -> Dict[s
         else:
             logger.warning(f"Source {source_name} is stale: {age_hours:.1f}h > {max_age_hours}h")
     
-    overall_fresh = all(result['is_fresh'] for result in freshness_results.values())
-    avg_freshness_score = sum(result['freshness_score'] for result in freshness_results.values()) / len(freshness_results)
+    avg_freshness_score = total_freshness_score / len(sources) if sources else 0.0
     
     return {
         'status': 'success',
@@ -193,6 +245,7 @@ def generate_quality_report(report_config: Dict[str, Any], **context) -> Dict[st
     
     execution_date = context['execution_date']
     report_format = report_config.get('format', 'json')
+    now_iso = datetime.now().isoformat()
     
     # Compile quality report
     quality_report = {
@@ -209,7 +262,7 @@ def generate_quality_report(report_config: Dict[str, Any], **context) -> Dict[st
             'freshness_assessment': freshness_results
         },
         'recommendations': [],
-        'report_generation_time': datetime.now().isoformat()
+        'report_generation_time': now_iso
     }
     
     # Add recommendations based on results
@@ -219,9 +272,15 @@ def generate_quality_report(report_config: Dict[str, Any], **context) -> Dict[st
     if freshness_results and not freshness_results.get('overall_fresh'):
         quality_report['recommendations'].append("Check data pipeline freshness issues")
     
-    # Mock report file generation
     report_filename = f"data_quality_report_{execution_date.strftime('%Y%m%d')}.{report_format}"
     report_path = f"/tmp/reports/{report_filename}"
+    report_size_kb = 125  # Mock file size
+    
+    if report_format == 'json':
+        report_bytes = _serialize_report(quality_report)
+        Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(report_path).write_bytes(report_bytes)
+        report_size_kb = round(len(report_bytes) / 1024, 1)
     
     logger.info(f"Generated quality report: {report_path}")
     
@@ -231,8 +290,8 @@ def generate_quality_report(report_config: Dict[str, Any], **context) -> Dict[st
         'report_format': report_format,
         'overall_quality_score': quality_report['summary']['overall_quality_score'],
         'recommendations_count': len(quality_report['recommendations']),
-        'report_size_kb': 125,  # Mock file size
-        'generation_time': datetime.now().isoformat()
+        'report_size_kb': report_size_kb,
+        'generation_time': now_iso
     }
 
 
@@ -249,6 +308,13 @@ def alert_on_quality_issues(alert_config: Dict[str, Any], **context) -> Dict[str
     """
     logger.info("Checking for data quality alerts")
     
+    recipients = alert_config.get('email_recipients', [])
+    
+    # Nothing to send and no threshold to report on: skip the XCom round-trip
+    if not recipients and 'quality_threshold' not in alert_config:
+        logger.info("Quality alerting not configured, skipping")
+        return {'status': 'skipped', 'reason': 'no_recipients'}
+    
     # Get quality report results
     ti = context['ti']
     report_results = ti.xcom_pull(task_ids='generate_quality_report')
@@ -259,7 +325,6 @@ def alert_on_quality_issues(alert_config: Dict[str, Any], **context) -> Dict[str
     
     quality_score = report_results.get('overall_quality_score', 1.0)
     alert_threshold = alert_config.get('quality_threshold', 0.8)
-    recipients = alert_config.get('email_recipients', [])
     
     should_alert = quality_score < alert_threshold
     
@@ -110,8 +110,9 @@ def validate_data_schema(schema_config: Dict[str, Any], **context) -> Dict[str,
         'status', 'category', 'value'
     ]
     
-    missing_columns = [col for col in expected_columns if col not in actual_columns]
-    missing_required = [col for col in required_columns if col not in actual_columns]
+    actual_column_set = frozenset(actual_columns)
+    missing_columns = [col for col in expected_columns if col not in actual_column_set]
+    missing_required = [col for col in required_columns if col not in actual_column_set]
     
     schema_valid = len(missing_required) == 0
     
@@ -150,6 +151,7 @@ def validate_data_ranges(ranges_config: Dict[str, Any], **context) -> Dict[str,
     
     # Mock range validation
     validation_results = []
+    failed_columns = []
     for check in range_checks:
         column = check.get('column')
         min_val = check.get('min')
@@ -172,14 +174,14 @@ def validate_data_ranges(ranges_config: Dict[str, Any], **context) -> Dict[str,
         validation_results.append(result)
         
         if not is_valid:
+            failed_columns.append(column)
             logger.error(f"Range validation failed for {column}: {violations} violations")
         else:
             logger.info(f"Range validation passed for {column}")
     
-    all_valid = all(result['is_valid'] for result in validation_results)
+    all_valid = not failed_columns
     
     if not all_valid:
-        failed_columns = [r['column'] for r in validation_results if not r['is_valid']]
         raise ValueError(f"Range validation failed for columns: {failed_columns}")
     
     return {
@@ -207,9 +209,9 @@ def validate_business_rules(rules_config: Dict[str, Any], **context) -> Dict[str
     
     # Mock business rule validation
     rule_results = []
+    failed_rules = []
     for rule in rules:
-        rule_name = rule.get('name')
-        rule_type = rule.get('type')
+        rule_name, rule_type = rule.get('name'), rule.get('type')
         
         # Mock: assume all rules pass
         violations = 0  # Mock: no violations
@@ -226,12 +228,12 @@ def validate_business_rules(rules_config: Dict[str, Any], **context) -> Dict[str
         if is_valid:
             logger.info(f"Business rule '{rule_name}' passed")
         else:
+            failed_rules.append(rule_name)
             logger.error(f"Business rule '{rule_name}' failed: {violations} violations")
     
-    all_rules_valid = all(result['is_valid'] for result in rule_results)
+    all_rules_valid = not failed_rules
     
     if not all_rules_valid:
-        failed_rules = [r['rule_name'] for r in rule_results if not r['is_valid']]
         raise ValueError(f"Business rule validation failed: {failed_rules}")
     
     return {
@@ -4,10 +4,10 @@ ETL Functions for DAG Factory
 Common ETL operations used across multiple DAGs.
 """
 
-import pandas as pd
 import logging
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ._common import _now_iso
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +33,7 @@ def extract_data(source_config: Dict[str, Any], **context) -> Dict[str, Any]:
     return {
         'status': 'success',
         'records_extracted': 1000,
-        'extraction_time': datetime.now().isoformat(),
+        'extraction_time': _now_iso(),
         'source': source_config.get('type', 'unknown')
     }
 
@@ -64,7 +64,7 @@ def transform_data(transformation_config: Dict[str, Any], **context) -> Dict[str
     return {
         'status': 'success',
         'records_transformed': extract_results.get('records_extracted', 0),
-        'transformation_time': datetime.now().isoformat(),
+        'transformation_time': _now_iso(),
         'rules_applied': transformation_config.get('rules', [])
     }
 
@@ -96,7 +96,7 @@ def load_data(destination_config: Dict[str, Any], **context) -> Dict[str, Any]:
     return {
         'status': 'success',
         'records_loaded': records_to_load,
-        'load_time': datetime.now().isoformat(),
+        'load_time': _now_iso(),
         'destination': destination_config.get('type', 'unknown')
     }
 
@@ -135,5 +135,85 @@ def validate_etl_results(validation_config: Dict[str, Any], **context) -> Dict[s
         'status': 'success',
         'validation_passed': validation_passed,
         'records_validated': records_loaded,
-        'validation_time': datetime.now().isoformat()
+        'validation_time': _now_iso()
+    }
+
+
+# Above this many expected records the per-task topology is preferred
+INLINE_ETL_MAX_RECORDS = 100_000
+
+
+class _InProcessXCom:
+    """Minimal stand-in for the task instance, serving XComs from memory.
+    
+    Mirrors TaskInstance: pushes are stored under the running step's
+    ``task_id`` and ``key``, and pulls default to the ``return_value`` key.
+    """
+
+    def __init__(self):
+        self.task_id: Optional[str] = None
+        self._values: Dict[Tuple[str, str], Any] = {}
+
+    def xcom_push(self, key: str, value: Any, **kwargs) -> None:
+        self._values[(self.task_id, key)] = value
+
+    def xcom_pull(self, task_ids: Optional[Union[str, List[str]]] = None,
+                  key: str = 'return_value', **kwargs) -> Any:
+        if task_ids is None:
+            task_ids = self.task_id
+        if isinstance(task_ids, str):
+            return self._values.get((task_ids, key))
+        return [self._values.get((task_id, key)) for task_id in task_ids]
+
+    def run(self, task_id: str, func, *args, **context) -> Any:
+        """Run one step as ``task_id`` and push its result as Airflow would."""
+        self.task_id = task_id
+        result = func(*args, **context)
+        self.xcom_push('return_value', result)
+        return result
+
+
+def run_etl_inprocess(source_config: Dict[str, Any],
+                      transformation_config: Dict[str, Any],
+                      destination_config: Dict[str, Any],
+                      validation_config: Dict[str, Any],
+                      **context) -> Dict[str, Any]:
+    """
+    Run extract, transform, load and validate within a single task.
+    
+    Intermediate results are handed over in memory instead of through XCom,
+    which avoids a metadata DB round-trip and a scheduling hop per step.
+    
+    Args:
+        source_config: Configuration for data source
+        transformation_config: Transformation configuration
+        destination_config: Destination configuration
+        validation_config: Validation rules configuration
+        context: Airflow context
+        
+    Returns:
+        Dict containing the results of every step
+    """
+    expected_records = source_config.get('expected_records', 0)
+    if expected_records >= INLINE_ETL_MAX_RECORDS:
+        logger.warning(
+            f"Running ETL in-process for {expected_records} expected records; "
+            f"consider separate tasks above {INLINE_ETL_MAX_RECORDS}"
+        )
+    
+    ti = _InProcessXCom()
+    step_context = dict(context, ti=ti)
+    
+    ti.run('extract_data', extract_data, source_config, **step_context)
+    ti.run('transform_data', transform_data, transformation_config, **step_context)
+    ti.run('load_data', load_data, destination_config, **step_context)
+    validation_results = ti.run('validate_etl_results', validate_etl_results,
+                                validation_config, **step_context)
+    
+    return {
+        'status': 'success',
+        'extract': ti.xcom_pull(task_ids='extract_data'),
+        'transform': ti.xcom_pull(task_ids='transform_data'),
+        'load': ti.xcom_pull(task_ids='load_data'),
+        'validation': validation_results
     }
@@ -5,12 +5,11 @@ ML pipeline operations including training, validation, and deployment.
 """
 
 import logging
-import joblib
-import numpy as np
 from typing import Any, Dict, List, Optional, Tuple
-from datetime import datetime
 from pathlib import Path
 
+from ._common import _now_iso
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,7 +38,7 @@ def prepare_training_data(data_config: Dict[str, Any], **context) -> Dict[str, A
         'feature_count': feature_count,
         'sample_count': sample_count,
         'data_path': f"/tmp/training_data_{execution_date.strftime('%Y%m%d')}.parquet",
-        'preparation_time': datetime.now().isoformat()
+        'preparation_time': _now_iso()
     }
 
 
@@ -77,7 +76,7 @@ def train_model(model_config: Dict[str, Any], **context) -> Dict[str, Any]:
         'accuracy': 0.85,  # Mock accuracy
         'feature_count': data_results.get('feature_count'),
         'training_samples': data_results.get('sample_count'),
-        'training_time': datetime.now().isoformat()
+        'training_time': _now_iso()
     }
 
 
@@ -117,7 +116,7 @@ def validate_model(validation_config: Dict[str, Any], **context) -> Dict[str, An
         'accuracy': accuracy,
         'min_accuracy_threshold': min_accuracy,
         'model_path': training_results.get('model_path'),
-        'validation_time': datetime.now().isoformat()
+        'validation_time': _now_iso()
     }
 
 
@@ -156,7 +155,7 @@ def deploy_model(deployment_config: Dict[str, Any], **context) -> Dict[str, Any]
         'model_path': model_path,
         'deployment_target': deployment_target,
         'accuracy': validation_results.get('accuracy'),
-        'deployment_time': datetime.now().isoformat()
+        'deployment_time': _now_iso()
     }
 
 
@@ -189,5 +188,5 @@ def generate_model_report(report_config: Dict[str, Any], **context) -> Dict[str,
         'report_path': report_path,
         'deployment_id': deployment_results.get('deployment_id'),
         'model_accuracy': deployment_results.get('accuracy'),
-        'report_time': datetime.now().isoformat()
+        'report_time': _now_iso()
     }
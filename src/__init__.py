@@ -9,11 +9,30 @@ __version__ = "1.0.0"
 __author__ = "Bruno Peixoto"
 __email__ = "bruno@example.com"
 
-# Import main classes for easy access
-from .dag_factory import DAGFactory
-from .utils import ConfigurationError, DAGFactoryBaseError
-from .managers.template import TemplateManager, ConfigurationComposer
-from .managers.security import SecurityManager, AccessLevel, AuditAction
+import importlib
+
+# Main classes are resolved on first access so that importing a submodule
+# (e.g. the CLI) does not pull in the whole package and its dependencies
+_LAZY_IMPORTS = {
+    "DAGFactory": ".dag_factory",
+    "ConfigurationError": ".utils",
+    "DAGFactoryBaseError": ".utils",
+    "TemplateManager": ".managers.template",
+    "ConfigurationComposer": ".managers.template",
+    "SecurityManager": ".managers.security",
+    "AccessLevel": ".managers.security",
+    "AuditAction": ".managers.security",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "DAGFactory",
@@ -5,19 +5,55 @@ Usage: python enhanced_dag_factory_cli.py [command] [options]
 """
 
 import argparse
-import json
+import contextlib
+import functools
+import importlib.util
+import io
 import sys
 from pathlib import Path
 from typing import Optional
 
-# Add the project root to Python path
-sys.path.insert(0, str(Path(__file__).parent))
-
-from .dag_factory import DAGFactory
 from .utils import ConfigurationError, DAGFactoryBaseError as DAGFactoryError, setup_logger
-from .managers.template import TemplateManager, ConfigurationComposer
-from .managers.security import SecurityManager, AccessLevel, AuditAction
-from .self_service_ui import create_app
+
+
+@functools.lru_cache(maxsize=None)
+def _orjson():
+    """Return the orjson module if installed; imported on first JSON output."""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+@functools.lru_cache(maxsize=None)
+def _json_encoder():
+    """Indented JSON encoder used when orjson isn't installed, built on first use."""
+    import json
+    
+    return json.JSONEncoder(indent=2)
+
+
+def _json_bytes(data) -> bytes:
+    """Encode ``data`` as indented, newline-terminated JSON bytes."""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        )
+    return (_json_encoder().encode(data) + "\n").encode('utf-8')
+
+
+def _print_json(data):
+    """Print indented JSON, writing bytes straight to stdout when possible."""
+    stdout_buffer = getattr(sys.stdout, 'buffer', None)
+    if stdout_buffer is None:
+        print(_json_encoder().encode(data))
+        return
+    
+    sys.stdout.flush()
+    stdout_buffer.write(_json_bytes(data))
+    stdout_buffer.flush()
 
 
 def setup_logging():
@@ -25,251 +61,361 @@ def setup_logging():
     return setup_logger(__name__)
 
 
+@functools.lru_cache(maxsize=8)
+def _get_factory(config_dir, templates_dir, enable_security):
+    """Return a DAGFactory shared by every command run in this process."""
+    from .dag_factory import DAGFactory
+    
+    return DAGFactory(
+        config_dir=config_dir,
+        templates_dir=templates_dir,
+        enable_security=enable_security
+    )
+
+
+def _cli_errors(config_error_format, error_format="❌ Unexpected error: {error}"):
+    """Report a command's failure with the given formats and return False."""
+    def decorator(command):
+        @functools.wraps(command)
+        def wrapper(args):
+            try:
+                return command(args)
+            except (ConfigurationError, DAGFactoryError) as e:
+                print(config_error_format.format(error=e))
+                return False
+            except Exception as e:
+                print(error_format.format(error=e))
+                return False
+        return wrapper
+    return decorator
+
+
+def _summarize(config):
+    """Collect the config fields the CLI reports on, reading each key once."""
+    tasks = config.get('tasks', [])
+    task_groups = config.get('task_groups')
+    assets = config.get('assets')
+    
+    return {
+        'tasks': tasks,
+        'task_count': len(tasks),
+        'template_extends': config.get('template', {}).get('extends'),
+        'task_group_count': len(task_groups) if task_groups is not None else None,
+        'asset_counts': (
+            (len(assets.get('consumes', [])), len(assets.get('produces', [])))
+            if assets is not None else None
+        ),
+    }
+
+
+@_cli_errors("❌ Configuration validation failed:\n   {error}")
 def validate_command(args):
     """Validate configuration with enhanced features."""
-    try:
-        factory = DAGFactory(
-            config_dir=args.config_dir,
-            templates_dir=args.templates_dir,
-            enable_security=args.enable_security
-        )
+    factory = _get_factory(args.config_dir, args.templates_dir, args.enable_security)
+    
+    config = factory.load_config(
+        args.config_file, 
+        username=args.username,
+        environment=args.environment
+    )
+    
+    lines = [f"✅ Configuration '{args.config_file}' is valid"]
+    
+    if args.verbose:
+        summary = _summarize(config)
+        lines.append(f"DAG ID: {config['dag_id']}")
+        lines.append(f"Schedule: {config.get('schedule', 'Not specified')}")
+        lines.append(f"Tasks: {summary['task_count']}")
         
-        config = factory.load_config(
-            args.config_file, 
-            username=args.username,
-            environment=args.environment
-        )
+        if summary['template_extends'] is not None:
+            lines.append(f"Template: {summary['template_extends']}")
         
-        print(f"✅ Configuration '{args.config_file}' is valid")
+        if args.environment:
+            lines.append(f"Environment: {args.environment}")
         
-        if args.verbose:
-            print(f"DAG ID: {config['dag_id']}")
-            print(f"Schedule: {config.get('schedule', 'Not specified')}")
-            print(f"Tasks: {len(config.get('tasks', []))}")
-            
-            if 'template' in config:
-                template_info = config['template']
-                if 'extends' in template_info:
-                    print(f"Template: {template_info['extends']}")
-            
-            if args.environment:
-                print(f"Environment: {args.environment}")
-            
-            if 'task_groups' in config:
-                print(f"Task Groups: {len(config['task_groups'])}")
-            
-            if 'assets' in config:
-                consumes = len(config['assets'].get('consumes', []))
-                produces = len(config['assets'].get('produces', []))
-                print(f"Assets - Consumes: {consumes}, Produces: {produces}")
+        if summary['task_group_count'] is not None:
+            lines.append(f"Task Groups: {summary['task_group_count']}")
         
-        return True
+        if summary['asset_counts'] is not None:
+            consumes, produces = summary['asset_counts']
+            lines.append(f"Assets - Consumes: {consumes}, Produces: {produces}")
+    
+    print("\n".join(lines))
+    return True
+
+
+# Command arguments shared by every file a batch worker validates
+_batch_args = {}
+
+
+def _init_batch_worker(batch_args):
+    """Process pool initializer: remember the arguments and build the factory once."""
+    _batch_args.update(batch_args)
+    _get_factory(batch_args['config_dir'], batch_args['templates_dir'],
+                 batch_args['enable_security'])
+
+
+def _validate_in_worker(config_file):
+    """Validate one file in a pool worker, returning its result and captured output."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        is_valid = validate_command(argparse.Namespace(**dict(_batch_args, config_file=config_file)))
+    return is_valid, output.getvalue()
+
+
+def validate_batch_command(args):
+    """Validate several configurations in one process, reusing the factory."""
+    if args.jobs > 1 and len(args.config_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
         
-    except (ConfigurationError, DAGFactoryError) as e:
-        print(f"❌ Configuration validation failed:")
-        print(f"   {str(e)}")
-        return False
-    except Exception as e:
-        print(f"❌ Unexpected error: {str(e)}")
-        return False
+        # Workers build their factory once; output is replayed in input order
+        results = []
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_batch_worker,
+                                 initargs=(vars(args),)) as executor:
+            for is_valid, output in executor.map(_validate_in_worker, args.config_files):
+                sys.stdout.write(output)
+                results.append(is_valid)
+    else:
+        results = [
+            validate_command(argparse.Namespace(**dict(vars(args), config_file=config_file)))
+            for config_file in args.config_files
+        ]
+    
+    failed = results.count(False)
+    print(f"📊 Validated {len(results)} configurations: {len(results) - failed} valid, {failed} invalid")
+    return failed == 0
 
 
+@_cli_errors("❌ Error: {error}")
 def generate_command(args):
     """Generate DAG with enhanced features."""
+    factory = _get_factory(args.config_dir, args.templates_dir, args.enable_security)
+    
+    # Load and validate configuration
+    config = factory.load_config(
+        args.config_file,
+        username=args.username,
+        environment=args.environment
+    )
+    print(f"✅ Configuration loaded: {config['dag_id']}")
+    summary = _summarize(config)
+    
+    if args.dry_run:
+        print("✅ Dry run successful - configuration is valid")
+        return True
+    
+    # Generate DAG (only if Airflow is available)
     try:
-        factory = DAGFactory(
-            config_dir=args.config_dir,
-            templates_dir=args.templates_dir,
-            enable_security=args.enable_security
-        )
-        
-        # Load and validate configuration
-        config = factory.load_config(
-            args.config_file,
-            username=args.username,
-            environment=args.environment
-        )
-        print(f"✅ Configuration loaded: {config['dag_id']}")
-        
-        if args.dry_run:
-            print("✅ Dry run successful - configuration is valid")
-            return True
-        
-        # Generate DAG (only if Airflow is available)
-        try:
-            dag = factory.create_dag(config)
-            print(f"✅ DAG generated successfully: {dag.dag_id}")
-            
-            # Extract DAG metadata
-            metadata = {
-                "dag_id": dag.dag_id,
-                "description": dag.description,
-                "schedule_interval": str(dag.schedule_interval),
-                "start_date": dag.start_date.isoformat() if dag.start_date else None,
-                "catchup": dag.catchup,
-                "max_active_runs": dag.max_active_runs,
-                "tags": dag.tags,
-                "task_count": len(dag.tasks),
-                "task_ids": [task.task_id for task in dag.tasks],
-                "template_used": config.get('template', {}).get('extends'),
-                "environment": args.environment
-            }
-            
-        except Exception as e:
-            # If Airflow isn't available, create metadata from config
-            print(f"⚠️  Airflow not available, creating metadata from config")
-            metadata = {
-                "dag_id": config['dag_id'],
-                "description": config.get('description', ''),
-                "schedule_interval": config.get('schedule', '@daily'),
-                "start_date": config.get('start_date'),
-                "catchup": config.get('catchup', False),
-                "max_active_runs": config.get('max_active_runs', 1),
-                "tags": config.get('tags', []),
-                "task_count": len(config.get('tasks', [])),
-                "task_ids": [task['task_id'] for task in config.get('tasks', [])],
-                "template_used": config.get('template', {}).get('extends'),
-                "environment": args.environment
-            }
-        
-        if args.output:
-            with open(args.output, 'w') as f:
-                json.dump(metadata, f, indent=2)
-            print(f"📄 Metadata written to: {args.output}")
-        else:
-            print("📊 DAG Metadata:")
-            print(json.dumps(metadata, indent=2))
-        
-        # Show metrics if requested
-        if args.metrics:
-            metrics = factory.get_metrics()
-            print("📈 Generation Metrics:")
-            print(json.dumps(metrics, indent=2))
+        dag = factory.create_dag(config)
+        print(f"✅ DAG generated successfully: {dag.dag_id}")
         
-        return True
+        # Extract DAG metadata
+        dag_tasks = dag.tasks
+        task_ids = [task.task_id for task in dag_tasks]
+        metadata = {
+            "dag_id": dag.dag_id,
+            "description": dag.description,
+            "schedule_interval": str(dag.schedule_interval),
+            "start_date": dag.start_date.isoformat() if dag.start_date else None,
+            "catchup": dag.catchup,
+            "max_active_runs": dag.max_active_runs,
+            "tags": dag.tags,
+            "task_count": len(task_ids),
+            "task_ids": task_ids,
+            "tasks": [
+                {
+                    "task_id": task.task_id,
+                    "pool": task.pool,
+                    "pool_slots": task.pool_slots,
+                    "priority_weight": task.priority_weight,
+                    "queue": task.queue
+                }
+                for task in dag_tasks
+            ],
+            "template_used": summary['template_extends'],
+            "environment": args.environment
+        }
         
-    except (ConfigurationError, DAGFactoryError) as e:
-        print(f"❌ Error: {str(e)}")
-        return False
     except Exception as e:
-        print(f"❌ Unexpected error: {str(e)}")
-        return False
+        # If Airflow isn't available, create metadata from config
+        print(f"⚠️  Airflow not available, creating metadata from config")
+        metadata = {
+            "dag_id": config['dag_id'],
+            "description": config.get('description', ''),
+            "schedule_interval": config.get('schedule', '@daily'),
+            "start_date": config.get('start_date'),
+            "catchup": config.get('catchup', False),
+            "max_active_runs": config.get('max_active_runs', 1),
+            "tags": config.get('tags', []),
+            "task_count": summary['task_count'],
+            "task_ids": [task['task_id'] for task in summary['tasks']],
+            "tasks": [
+                {
+                    "task_id": task['task_id'],
+                    # Same defaults Airflow fills in when a task sets none
+                    "pool": task.get('pool') or 'default_pool',
+                    "pool_slots": task.get('pool_slots', 1),
+                    "priority_weight": task.get('priority_weight', 1),
+                    "queue": task.get('queue') or 'default'
+                }
+                for task in summary['tasks']
+            ],
+            "template_used": summary['template_extends'],
+            "environment": args.environment
+        }
+    
+    if args.output:
+        # Unbuffered binary write: no text codec layer or isatty probe
+        Path(args.output).write_bytes(_json_bytes(metadata))
+        print(f"📄 Metadata written to: {args.output}")
+    else:
+        print("📊 DAG Metadata:")
+        _print_json(metadata)
+    
+    # Show metrics if requested
+    if args.metrics:
+        metrics = factory.get_metrics()
+        print("📈 Generation Metrics:")
+        _print_json(metrics)
+    
+    return True
 
 
+@_cli_errors("❌ Error listing templates: {error}", "❌ Error listing templates: {error}")
 def list_templates_command(args):
     """List available templates."""
-    try:
-        template_manager = TemplateManager(args.templates_dir)
-        templates = template_manager.list_available_templates()
-        
-        if not templates:
-            print("No templates found")
-            return True
-        
-        print(f"📋 Available Templates ({len(templates)}):")
-        print("-" * 40)
-        
-        for template_name in templates:
-            try:
-                template = template_manager.load_template(template_name)
-                description = template.get('description', 'No description')
-                tags = template.get('tags', [])
-                
-                print(f"• {template_name}")
-                print(f"  Description: {description}")
-                if tags:
-                    print(f"  Tags: {', '.join(tags)}")
-                
-                if args.verbose:
-                    extends = template.get('template', {}).get('extends')
-                    if extends:
-                        print(f"  Extends: {extends}")
-                    
-                    if 'parameters' in template:
-                        param_count = len(template['parameters'])
-                        print(f"  Parameters: {param_count}")
-                
-                print()
-                
-            except Exception as e:
-                print(f"• {template_name} (Error loading: {str(e)})")
-        
+    from .managers.template import TemplateManager
+    
+    template_manager = TemplateManager(args.templates_dir)
+    templates = template_manager.list_available_templates()
+    
+    if not templates:
+        print("No templates found")
         return True
+    
+    def load(template_name):
+        try:
+            return template_manager.load_template(template_name)
+        except Exception as e:
+            return e
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # Template files are read concurrently; output below stays in listing order
+    with ThreadPoolExecutor(max_workers=min(32, len(templates))) as executor:
+        loaded_templates = list(executor.map(load, templates))
+    
+    lines = [f"📋 Available Templates ({len(templates)}):", "-" * 40]
+    for template_name, template in zip(templates, loaded_templates):
+        if isinstance(template, Exception):
+            lines.append(f"• {template_name} (Error loading: {str(template)})")
+            continue
         
-    except Exception as e:
-        print(f"❌ Error listing templates: {str(e)}")
-        return False
-
-
-def security_command(args):
-    """Security management commands."""
-    try:
-        security_manager = SecurityManager()
-        
-        if args.security_action == 'list-users':
-            # List users and their permissions
-            roles_config = security_manager.access_control.roles_config
-            users = roles_config.get('users', {})
+        try:
+            description = template.get('description', 'No description')
+            tags = template.get('tags', [])
             
-            print(f"👥 Users ({len(users)}):")
-            print("-" * 50)
+            entry = [f"• {template_name}", f"  Description: {description}"]
+            if tags:
+                entry.append(f"  Tags: {', '.join(tags)}")
             
-            for username, user_config in users.items():
-                roles = user_config.get('roles', [])
-                email = user_config.get('email', 'N/A')
-                department = user_config.get('department', 'N/A')
-                
-                user_info = security_manager.get_user_permissions(username)
-                permissions = user_info['permissions']
+            if args.verbose:
+                extends = template.get('template', {}).get('extends')
+                if extends:
+                    entry.append(f"  Extends: {extends}")
                 
-                print(f"• {username}")
-                print(f"  Email: {email}")
-                print(f"  Department: {department}")
-                print(f"  Roles: {', '.join(roles)}")
-                print(f"  Permissions: {', '.join(permissions)}")
-                print()
-        
-        elif args.security_action == 'check-access':
-            if not args.username or not args.operation:
-                print("❌ Username and operation required for access check")
-                return False
-            
-            has_access = security_manager.validate_user_access(
-                args.username, args.operation, args.resource
-            )
-            
-            if has_access:
-                print(f"✅ User '{args.username}' has '{args.operation}' access")
-            else:
-                print(f"❌ User '{args.username}' does NOT have '{args.operation}' access")
-        
-        elif args.security_action == 'audit-logs':
-            logs = security_manager.audit_logger.get_audit_logs(
-                user=args.username,
-                limit=args.limit or 20
-            )
+                if 'parameters' in template:
+                    param_count = len(template['parameters'])
+                    entry.append(f"  Parameters: {param_count}")
             
-            print(f"📋 Audit Logs ({len(logs)} entries):")
-            print("-" * 80)
+            entry.append("")
+            lines.extend(entry)
             
-            for log in logs:
-                timestamp = log.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                status = "✅" if log.success else "❌"
-                
-                print(f"{status} {timestamp} | {log.user} | {log.action.value} | {log.resource}")
-                if log.details:
-                    print(f"    Details: {log.details}")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Security error: {str(e)}")
+        except Exception as e:
+            lines.append(f"• {template_name} (Error loading: {str(e)})")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+    return True
+
+
+def _list_users(security_manager, args):
+    """List users and their permissions."""
+    users = security_manager.get_all_user_permissions()
+    
+    lines = [f"👥 Users ({len(users)}):", "-" * 50]
+    
+    for username, user_info in users.items():
+        lines.extend((
+            f"• {username}",
+            f"  Email: {user_info['email'] or 'N/A'}",
+            f"  Department: {user_info['department'] or 'N/A'}",
+            f"  Roles: {', '.join(user_info['roles'])}",
+            f"  Permissions: {', '.join(user_info['permissions'])}",
+            "",
+        ))
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+    return True
+
+
+def _check_access(security_manager, args):
+    """Check whether a user may perform an operation."""
+    if not args.username or not args.operation:
+        print("❌ Username and operation required for access check")
         return False
+    
+    has_access = security_manager.validate_user_access(
+        args.username, args.operation, args.resource
+    )
+    
+    if has_access:
+        print(f"✅ User '{args.username}' has '{args.operation}' access")
+    else:
+        print(f"❌ User '{args.username}' does NOT have '{args.operation}' access")
+    
+    return True
+
+
+def _show_audit_logs(security_manager, args):
+    """Print the most recent audit log entries."""
+    logs = security_manager.audit_logger.get_audit_logs(
+        user=args.username,
+        limit=args.limit or 20
+    )
+    
+    lines = [f"📋 Audit Logs ({len(logs)} entries):", "-" * 80]
+    for log in logs:
+        timestamp = log.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        status = "✅" if log.success else "❌"
+        
+        lines.append(f"{status} {timestamp} | {log.user} | {log.action.value} | {log.resource}")
+        if log.details:
+            lines.append(f"    Details: {log.details}")
+    sys.stdout.write("\n".join(lines) + "\n")
+    return True
+
+
+# Security action name -> handler(security_manager, args)
+_SECURITY_ACTIONS = {
+    'list-users': _list_users,
+    'check-access': _check_access,
+    'audit-logs': _show_audit_logs,
+}
+
+
+@_cli_errors("❌ Security error: {error}", "❌ Security error: {error}")
+def security_command(args):
+    """Security management commands."""
+    from .managers.security import SecurityManager
+    
+    security_manager = SecurityManager()
+    return _SECURITY_ACTIONS[args.security_action](security_manager, args)
 
 
 def ui_command(args):
     """Start the self-service UI."""
-    if not UI_AVAILABLE:
+    # Locate Flask without importing it; only this command pays for the import
+    if importlib.util.find_spec('flask') is None:
         print("❌ Self-service UI not available. Install Flask with: pip install flask")
         return False
         
@@ -280,6 +426,8 @@ def ui_command(args):
         print(f"   Web interface: http://localhost:{args.port}")
         print("   Press Ctrl+C to stop")
         
+        from .self_service_ui import create_app
+        
         app = create_app(args.config_dir)
         app.run(debug=args.debug, host='0.0.0.0', port=args.port)
         
@@ -288,82 +436,104 @@ def ui_command(args):
     except Exception as e:
         print(f"❌ UI error: {str(e)}")
         return False
+    
+    return True
 
 
-def main():
-    setup_logging()
-    
-    parser = argparse.ArgumentParser(description="Enhanced DAG Factory CLI")
-    subparsers = parser.add_subparsers(dest='command', help='Available commands')
-    
-    # Common arguments
-    common_parser = argparse.ArgumentParser(add_help=False)
-    common_parser.add_argument('--config-dir', default='dags/configs', 
-                              help='Configuration directory')
-    common_parser.add_argument('--templates-dir', default='dags/templates',
-                              help='Templates directory')
-    common_parser.add_argument('--enable-security', action='store_true',
-                              help='Enable security features')
-    common_parser.add_argument('--username', help='Username for security context')
-    common_parser.add_argument('--environment', choices=['dev', 'staging', 'prod'],
-                              help='Target environment')
-    common_parser.add_argument('--verbose', '-v', action='store_true',
-                              help='Verbose output')
-    
-    # Validate command
-    validate_parser = subparsers.add_parser('validate', parents=[common_parser],
-                                           help='Validate configuration')
+def _add_common_arguments(parser):
+    """Add the arguments shared by every subcommand to ``parser``."""
+    parser.add_argument('--config-dir', default='dags/configs', 
+                        help='Configuration directory')
+    parser.add_argument('--templates-dir', default='dags/templates',
+                        help='Templates directory')
+    parser.add_argument('--enable-security', action='store_true',
+                        help='Enable security features')
+    parser.add_argument('--username', help='Username for security context')
+    parser.add_argument('--environment', choices=['dev', 'staging', 'prod'],
+                        help='Target environment')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Verbose output')
+
+
+def _build_validate_parser(validate_parser):
     validate_parser.add_argument('config_file', help='Configuration file to validate')
-    
-    # Generate command
-    generate_parser = subparsers.add_parser('generate', parents=[common_parser],
-                                           help='Generate DAG from configuration')
+
+
+def _build_validate_batch_parser(validate_batch_parser):
+    validate_batch_parser.add_argument('config_files', nargs='+',
+                                       help='Configuration files to validate')
+    validate_batch_parser.add_argument('--jobs', '-j', type=int, default=1,
+                                       help='Number of worker processes')
+
+
+def _build_generate_parser(generate_parser):
     generate_parser.add_argument('config_file', help='Configuration file')
     generate_parser.add_argument('--dry-run', action='store_true',
                                 help='Validate only, don\'t generate')
     generate_parser.add_argument('--output', '-o', help='Output file for metadata')
     generate_parser.add_argument('--metrics', action='store_true',
                                 help='Show generation metrics')
-    
-    # List templates command
-    templates_parser = subparsers.add_parser('list-templates', parents=[common_parser],
-                                            help='List available templates')
-    
-    # Security command
-    security_parser = subparsers.add_parser('security', parents=[common_parser],
-                                           help='Security management')
+
+
+def _build_list_templates_parser(templates_parser):
+    pass
+
+
+def _build_security_parser(security_parser):
     security_parser.add_argument('security_action', 
-                                choices=['list-users', 'check-access', 'audit-logs'],
+                                choices=list(_SECURITY_ACTIONS),
                                 help='Security action to perform')
     security_parser.add_argument('--operation', help='Operation to check access for')
     security_parser.add_argument('--resource', help='Resource for access check')
     security_parser.add_argument('--limit', type=int, help='Limit for audit logs')
-    
-    # UI command
-    ui_parser = subparsers.add_parser('ui', parents=[common_parser],
-                                     help='Start self-service UI')
+
+
+def _build_ui_parser(ui_parser):
     ui_parser.add_argument('--port', type=int, default=5000, help='Port for web interface')
     ui_parser.add_argument('--debug', action='store_true', help='Enable debug mode')
+
+
+# Subcommand name -> (help text, argument builder, handler)
+COMMANDS = {
+    'validate': ('Validate configuration', _build_validate_parser, validate_command),
+    'validate-batch': ('Validate several configurations', _build_validate_batch_parser,
+                       validate_batch_command),
+    'generate': ('Generate DAG from configuration', _build_generate_parser, generate_command),
+    'list-templates': ('List available templates', _build_list_templates_parser, list_templates_command),
+    'security': ('Security management', _build_security_parser, security_command),
+    'ui': ('Start self-service UI', _build_ui_parser, ui_command),
+}
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    parser = argparse.ArgumentParser(description="Enhanced DAG Factory CLI")
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+    
+    # Only the invoked subcommand gets its arguments; the rest are registered
+    # by name so top-level --help still lists them
+    selected = argv[0] if argv else None
+    for name, (help_text, build_arguments, _) in COMMANDS.items():
+        if name == selected:
+            command_parser = subparsers.add_parser(name, help=help_text)
+            _add_common_arguments(command_parser)
+            build_arguments(command_parser)
+        else:
+            subparsers.add_parser(name, help=help_text)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
         return 1
     
+    # Configured only once a command will actually run
+    setup_logging()
+    
     # Execute command
-    success = False
-    
-    if args.command == 'validate':
-        success = validate_command(args)
-    elif args.command == 'generate':
-        success = generate_command(args)
-    elif args.command == 'list-templates':
-        success = list_templates_command(args)
-    elif args.command == 'security':
-        success = security_command(args)
-    elif args.command == 'ui':
-        success = ui_command(args)
+    success = COMMANDS[args.command][2](args)
     
     return 0 if success else 1
 
@@ -4,22 +4,28 @@ Production-ready solution for generating standardized DAGs from YAML configurati
 Enhanced with template inheritance, environment overrides, and security features.
 """
 
+import copy
+import functools
 import json
+import os
+import re
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union, Callable
+from typing import Dict, List, Any, Optional, Tuple, Union, Callable
 from pathlib import Path
 import importlib
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from abc import ABC, abstractmethod
 import jsonschema
-from jinja2 import Template, Environment, FileSystemLoader
 
 # Import new modules
 from .managers.template import ConfigurationComposer, TemplateManager, EnvironmentManager
 from .managers.security import SecurityManager, AccessLevel, AuditAction
 from .utils import (
     logger, ConfigurationError, DAGFactoryBaseError as DAGFactoryError,
-    substitute_env_vars, validate_dag_id, DEFAULT_DAG_ARGS, SUPPORTED_OPERATORS
+    substitute_env_vars, validate_dag_id, load_yaml_cached, DEFAULT_DAG_ARGS,
+    SUPPORTED_OPERATORS
 )
 
 try:
@@ -27,6 +33,17 @@ try:
 except ImportError:
     yaml = None
 
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers need no change
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 # Airflow imports (will be available in Airflow environment)
 try:
     from airflow import DAG
@@ -119,12 +136,16 @@ CONFIG_SCHEMA = {
 }
 
 
-@dataclass
+@dataclass(frozen=True)
 class ValidationResult:
     """Result of configuration validation."""
     is_valid: bool
-    errors: List[str] = field(default_factory=list)
-    warnings: List[str] = field(default_factory=list)
+    errors: Tuple[str, ...] = ()
+    warnings: Tuple[str, ...] = ()
+
+
+# Shared result for parameter checks that pass
+_OK_RESULT = ValidationResult(True)
 
 
 class OperatorRegistry:
@@ -165,70 +186,175 @@ class OperatorRegistry:
     
     def get_operator_class(self, operator_name: str):
         """Get operator class by name."""
-        if operator_name not in self._operators:
+        operator_def = self._operators.get(operator_name)
+        if operator_def is None:
             raise ConfigurationError(f"Unknown operator: {operator_name}")
-        return self._operators[operator_name]['class']
+        return operator_def['class']
     
     def validate_operator_params(self, operator_name: str, params: Dict[str, Any]) -> ValidationResult:
         """Validate operator parameters."""
-        if operator_name not in self._operators:
-            return ValidationResult(False, [f"Unknown operator: {operator_name}"])
+        operator_def = self._operators.get(operator_name)
+        if operator_def is None:
+            return ValidationResult(False, (f"Unknown operator: {operator_name}",))
         
-        operator_def = self._operators[operator_name]
-        errors = []
+        errors = None
         
-        # Check required parameters
+        # Check required parameters; the error list is only built once one is missing
         for required_param in operator_def['required_params']:
             if required_param not in params:
-                errors.append(f"Missing required parameter '{required_param}' for operator '{operator_name}'")
-        
-        result = ValidationResult(len(errors) == 0, errors)
-        return result
+                message = f"Missing required parameter '{required_param}' for operator '{operator_name}'"
+                if errors is None:
+                    errors = [message]
+                else:
+                    errors.append(message)
+        
+        if errors is None:
+            return _OK_RESULT
+        return ValidationResult(False, tuple(errors))
+
+
+def _compile_schema_validator(schema: Dict[str, Any]):
+    """Check a JSON schema once and build a reusable validator for it."""
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+def _compile_fast_validator(schema: Dict[str, Any]) -> Optional[Callable[[Any], Any]]:
+    """Compile a schema with fastjsonschema when installed, else return None.
+    
+    Defaults are not injected and formats are not checked, matching jsonschema.
+    """
+    if fastjsonschema is None:
+        return None
+    return fastjsonschema.compile(schema, use_default=False, use_formats=False,
+                                  detailed_exceptions=False)
+
+
+# Module-level rather than a class attribute: a plain function would bind as a method
+_FAST_SCHEMA_VALIDATOR = _compile_fast_validator(CONFIG_SCHEMA)
+
+# Business-rule constants, built once rather than per validated config
+_DAG_ID_PREFIXES = ('etl_', 'ml_', 'reporting_', 'data_quality_')
+_SCHEDULE_PREFIXES = ('@', 'cron(', '0 ')
+_DAYS_AGO_RE = re.compile(r'days_ago\((\d+)\)')
+
+_CONFIG_EXTENSIONS = frozenset(('.yaml', '.yml', '.json'))
+
+
+def _env_fingerprint() -> int:
+    """Hash of the process environment, which env var substitution reads."""
+    return hash(frozenset(os.environ.items()))
+
+
+def _topo_order(tasks: List[Dict[str, Any]]) -> Optional[List[str]]:
+    """Order task ids so that every task comes after its dependencies.
+    
+    Iterative Kahn's algorithm; dependencies on unknown tasks are ignored.
+    Returns None if the dependency graph contains a cycle.
+    """
+    indegree = {task['task_id']: 0 for task in tasks}
+    children = {}
+    for task in tasks:
+        task_id = task['task_id']
+        for dep in task.get('depends_on', ()):
+            if dep in indegree:
+                indegree[task_id] += 1
+                children.setdefault(dep, []).append(task_id)
+    
+    ready = deque(task_id for task_id, degree in indegree.items() if degree == 0)
+    order = []
+    while ready:
+        task_id = ready.popleft()
+        order.append(task_id)
+        for child in children.get(task_id, ()):
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    
+    return order if len(order) == len(indegree) else None
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_json_file(path: str, mtime_ns: int, size: int) -> Any:
+    """Parse a JSON file; ``mtime_ns`` and ``size`` only key the cache."""
+    with open(path, 'rb') as f:
+        return _json_loads(f.read())
+
+
+def _parse_config_file(config_path: Path) -> Dict[str, Any]:
+    """Parse a YAML/JSON configuration file, again only when its mtime or size changes.
+    
+    YAML goes through utils.load_yaml_cached, the cache templates and roles
+    also use. The parsed object is shared; deep-copy it before mutating.
+    """
+    suffix = config_path.suffix.lower()
+    if suffix in ('.yaml', '.yml'):
+        return load_yaml_cached(config_path)
+    if suffix == '.json':
+        stat = os.stat(config_path)
+        return _parse_json_file(os.path.abspath(config_path), stat.st_mtime_ns, stat.st_size)
+    raise ConfigurationError(f"Unsupported configuration format: {config_path.suffix}")
 
 
 class ConfigurationValidator:
     """Validates DAG configuration files."""
     
+    # Compiled once per process and shared by every validator instance
+    _schema_validator = _compile_schema_validator(CONFIG_SCHEMA)
+    
     def __init__(self, operator_registry: OperatorRegistry):
         self.operator_registry = operator_registry
         self.schema = CONFIG_SCHEMA
     
     def validate_config(self, config: Dict[str, Any]) -> ValidationResult:
         """Validate complete configuration."""
-        result = ValidationResult(True)
-        
-        # JSON Schema validation
-        try:
-            jsonschema.validate(config, self.schema)
-        except jsonschema.ValidationError as e:
-            result.is_valid = False
-            result.errors.append(f"Schema validation error: {e.message}")
-            return result
+        # JSON Schema validation; the compiled fast check clears valid configs,
+        # jsonschema then reports every violation, most relevant first
+        if not self._passes_fast_schema_check(config):
+            schema_errors = sorted(self._schema_validator.iter_errors(config),
+                                   key=jsonschema.exceptions.relevance, reverse=True)
+            if schema_errors:
+                return ValidationResult(False, tuple(
+                    f"Schema validation error: {error.message}" for error in schema_errors
+                ))
         
         # Business logic validation
-        self._validate_business_logic(config, result)
-        self._validate_task_dependencies(config, result)
-        self._validate_operators(config, result)
+        errors: List[str] = []
+        warnings: List[str] = []
+        self._validate_business_logic(config, warnings)
+        self._validate_task_dependencies(config, errors)
+        self._validate_operators(config, errors)
         
-        return result
+        return ValidationResult(not errors, tuple(errors), tuple(warnings))
     
-    def _validate_business_logic(self, config: Dict[str, Any], result: ValidationResult):
+    def _passes_fast_schema_check(self, config: Dict[str, Any]) -> bool:
+        """Run the fastjsonschema validator; False if unavailable or invalid."""
+        if _FAST_SCHEMA_VALIDATOR is None:
+            return False
+        try:
+            _FAST_SCHEMA_VALIDATOR(config)
+        except fastjsonschema.JsonSchemaException:
+            return False
+        return True
+    
+    def _validate_business_logic(self, config: Dict[str, Any], warnings: List[str]):
         """Validate business logic rules."""
         # Validate DAG ID naming convention
         dag_id = config.get('dag_id', '')
-        if not dag_id.startswith(('etl_', 'ml_', 'reporting_', 'data_quality_')):
-            result.warnings.append(f"DAG ID '{dag_id}' doesn't follow naming convention")
+        if not dag_id.startswith(_DAG_ID_PREFIXES):
+            warnings.append(f"DAG ID '{dag_id}' doesn't follow naming convention")
         
         # Validate schedule format
         schedule = config.get('schedule', '')
-        if schedule and not any(schedule.startswith(prefix) for prefix in ['@', 'cron(', '0 ']):
-            result.warnings.append(f"Schedule '{schedule}' might not be in correct format")
+        if schedule and not schedule.startswith(_SCHEDULE_PREFIXES):
+            warnings.append(f"Schedule '{schedule}' might not be in correct format")
         
         # Validate email configuration
         if config.get('email_on_failure', True) and not config.get('email'):
-            result.warnings.append("Email notifications enabled but no email addresses provided")
+            warnings.append("Email notifications enabled but no email addresses provided")
     
-    def _validate_task_dependencies(self, config: Dict[str, Any], result: ValidationResult):
+    def _validate_task_dependencies(self, config: Dict[str, Any], errors: List[str]):
         """Validate task dependencies for cycles and missing tasks."""
         tasks = {task['task_id'] for task in config.get('tasks', [])}
         
@@ -238,18 +364,18 @@ class ConfigurationValidator:
             
             # Check for self-dependency
             if task_id in depends_on:
-                result.errors.append(f"Task '{task_id}' cannot depend on itself")
+                errors.append(f"Task '{task_id}' cannot depend on itself")
             
             # Check for missing dependencies
             for dep in depends_on:
                 if dep not in tasks:
-                    result.errors.append(f"Task '{task_id}' depends on non-existent task '{dep}'")
+                    errors.append(f"Task '{task_id}' depends on non-existent task '{dep}'")
         
         # Simple cycle detection (for more complex graphs, use topological sort)
         if self._has_cycles(config.get('tasks', [])):
-            result.errors.append("Circular dependencies detected in task graph")
+            errors.append("Circular dependencies detected in task graph")
     
-    def _validate_operators(self, config: Dict[str, Any], result: ValidationResult):
+    def _validate_operators(self, config: Dict[str, Any], errors: List[str]):
         """Validate operator configurations."""
         for task in config.get('tasks', []):
             operator_name = task.get('operator', '')
@@ -257,42 +383,19 @@ class ConfigurationValidator:
             
             op_result = self.operator_registry.validate_operator_params(operator_name, parameters)
             if not op_result.is_valid:
-                result.errors.extend([f"Task '{task['task_id']}': {error}" for error in op_result.errors])
+                errors.extend([f"Task '{task['task_id']}': {error}" for error in op_result.errors])
     
     def _has_cycles(self, tasks: List[Dict[str, Any]]) -> bool:
-        """Simple cycle detection using DFS."""
-        # Build adjacency list
-        graph = {}
-        for task in tasks:
-            task_id = task['task_id']
-            graph[task_id] = task.get('depends_on', [])
-        
-        # DFS cycle detection
-        visited = set()
-        rec_stack = set()
-        
-        def dfs(node):
-            if node in rec_stack:
-                return True
-            if node in visited:
-                return False
-            
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in graph.get(node, []):
-                if neighbor in graph and dfs(neighbor):
-                    return True
-            
-            rec_stack.remove(node)
-            return False
-        
-        for task_id in graph:
-            if task_id not in visited:
-                if dfs(task_id):
-                    return True
-        
-        return False
+        """Cycle detection: a graph has a cycle iff it has no topological order."""
+        return _topo_order(tasks) is None
+
+
+@functools.lru_cache(maxsize=1024)
+def _import_callable(callable_str: str) -> Callable:
+    """Import ``module.attr`` once per process; failures are not cached."""
+    module_path, function_name = callable_str.rsplit('.', 1)
+    module = importlib.import_module(module_path)
+    return getattr(module, function_name)
 
 
 class TaskBuilder:
@@ -342,22 +445,13 @@ class TaskBuilder:
                 # Import and resolve callable from string
                 processed['python_callable'] = self._resolve_callable(callable_str)
         
-        # Handle Jinja2 template rendering in bash commands
-        if operator_name == 'bash' and 'bash_command' in processed:
-            command = processed['bash_command']
-            if isinstance(command, str) and '{{' in command:
-                template = Template(command)
-                # For now, just return as-is, Airflow will handle template rendering
-                pass
-        
+        # Jinja in bash_command is left untouched; Airflow renders it at execution time
         return processed
     
     def _resolve_callable(self, callable_str: str) -> Callable:
         """Resolve Python callable from string."""
         try:
-            module_path, function_name = callable_str.rsplit('.', 1)
-            module = importlib.import_module(module_path)
-            return getattr(module, function_name)
+            return _import_callable(callable_str)
         except Exception as e:
             raise ConfigurationError(f"Cannot resolve callable '{callable_str}': {str(e)}")
 
@@ -367,20 +461,30 @@ class AssetManager:
     
     def __init__(self):
         self._assets = {}
+        self._asset_groups: Dict[Tuple[str, ...], Tuple[Dataset, ...]] = {}
     
     def get_asset(self, asset_uri: str) -> Dataset:
         """Get or create an asset."""
-        if asset_uri not in self._assets:
-            self._assets[asset_uri] = Dataset(asset_uri)
-        return self._assets[asset_uri]
+        asset = self._assets.get(asset_uri)
+        if asset is None:
+            asset = self._assets[asset_uri] = Dataset(asset_uri)
+        return asset
+    
+    def _get_assets(self, asset_uris: List[str]) -> Tuple[Dataset, ...]:
+        """Resolve a list of URIs, reusing the tuple for repeated URI lists."""
+        key = tuple(asset_uris)
+        assets = self._asset_groups.get(key)
+        if assets is None:
+            assets = self._asset_groups[key] = tuple(self.get_asset(uri) for uri in key)
+        return assets
     
     def get_consumed_assets(self, asset_uris: List[str]) -> List[Dataset]:
-        """Get list of consumed assets."""
-        return [self.get_asset(uri) for uri in asset_uris]
+        """Get consumed assets."""
+        return list(self._get_assets(asset_uris))
     
     def get_produced_assets(self, asset_uris: List[str]) -> List[Dataset]:
-        """Get list of produced assets."""
-        return [self.get_asset(uri) for uri in asset_uris]
+        """Get produced assets."""
+        return list(self._get_assets(asset_uris))
 
 
 class DAGFactory:
@@ -414,6 +518,10 @@ class DAGFactory:
             'template_usage': {},
             'environment_usage': {}
         }
+        
+        # config path -> (file/env signature, template files signature,
+        #                 composed config, validation warnings)
+        self._composed_cache: Dict[Path, Tuple[tuple, tuple, Dict[str, Any], Tuple[str, ...]]] = {}
     
     def register_custom_operator(self, name: str, operator_class, required_params: List[str], 
                                  optional_params: List[str] = None):
@@ -431,39 +539,33 @@ class DAGFactory:
         try:
             # Load raw configuration
             if self.enable_security and self.security_manager and username:
+                # Access checks and audit logging must run on every load
                 config = self.security_manager.load_secure_configuration(config_path, username)
+                config, warnings = self._compose_and_validate(config, config_path, environment)
             else:
-                with open(config_path, 'r') as f:
-                    if config_path.suffix.lower() in ['.yaml', '.yml']:
-                        config = yaml.safe_load(f)
-                    elif config_path.suffix.lower() == '.json':
-                        config = json.load(f)
-                    else:
-                        raise ConfigurationError(f"Unsupported configuration format: {config_path.suffix}")
-            
-            # Apply template inheritance and environment overrides
-            config = self.composer.compose_configuration(config, environment)
-            
-            # Environment variable substitution
-            config = substitute_env_vars(config)
-            
-            # Validate composition
-            composition_errors = self.composer.validate_composition(config)
-            if composition_errors:
-                error_msg = f"Configuration composition failed for {config_path}:\n"
-                error_msg += "\n".join([f"  - {error}" for error in composition_errors])
-                raise ConfigurationError(error_msg)
-            
-            # Standard validation
-            validation_result = self.validator.validate_config(config)
-            
-            if not validation_result.is_valid:
-                error_msg = f"Configuration validation failed for {config_path}:\n"
-                error_msg += "\n".join([f"  - {error}" for error in validation_result.errors])
-                raise ConfigurationError(error_msg)
+                # Composition, env substitution and validation only depend on the file
+                # version, the templates it extends, the target environment and the
+                # process environment
+                stat = config_path.stat()
+                signature = (stat.st_mtime_ns, stat.st_size, environment, _env_fingerprint())
+                template_manager = self.composer.template_manager
+                cached = self._composed_cache.get(config_path)
+                if (cached is None or cached[0] != signature
+                        or not template_manager.signature_is_current(cached[1])):
+                    # Parsed once per file version; composition gets a private copy to mutate
+                    raw_config = _parse_config_file(config_path)
+                    config, warnings = self._compose_and_validate(
+                        copy.deepcopy(raw_config), config_path, environment
+                    )
+                    template_signature = ()
+                    if 'template' in raw_config and 'extends' in raw_config['template']:
+                        template_signature = template_manager.template_signature(raw_config['template']['extends'])
+                    cached = (signature, template_signature, config, warnings)
+                    self._composed_cache[config_path] = cached
+                config, warnings = copy.deepcopy(cached[2]), cached[3]
             
             # Log warnings
-            for warning in validation_result.warnings:
+            for warning in warnings:
                 logger.warning(f"Config warning in {config_path}: {warning}")
             
             # Track usage metrics
@@ -483,10 +585,36 @@ class DAGFactory:
         except json.JSONDecodeError as e:
             raise ConfigurationError(f"JSON parsing error in {config_path}: {str(e)}")
     
+    def _compose_and_validate(self, config: Dict[str, Any], config_path: Path,
+                              environment: Optional[str]) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+        """Compose a raw configuration and validate it, returning it with its warnings."""
+        # Apply template inheritance and environment overrides
+        config = self.composer.compose_configuration(config, environment)
+        
+        # Environment variable substitution
+        config = substitute_env_vars(config)
+        
+        # Validate composition
+        composition_errors = self.composer.validate_composition(config)
+        if composition_errors:
+            error_msg = f"Configuration composition failed for {config_path}:\n"
+            error_msg += "\n".join([f"  - {error}" for error in composition_errors])
+            raise ConfigurationError(error_msg)
+        
+        # Standard validation
+        validation_result = self.validator.validate_config(config)
+        
+        if not validation_result.is_valid:
+            error_msg = f"Configuration validation failed for {config_path}:\n"
+            error_msg += "\n".join([f"  - {error}" for error in validation_result.errors])
+            raise ConfigurationError(error_msg)
+        
+        return config, validation_result.warnings
+    
 
     def create_dag(self, config: Dict[str, Any]) -> DAG:
         """Create a DAG from configuration."""
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         try:
             # Extract DAG parameters
@@ -527,9 +655,10 @@ class DAGFactory:
             # Build tasks
             tasks = {}
             task_groups = {}
+            task_group_configs = config.get('task_groups', [])
             
             # Create task groups if specified
-            for group_config in config.get('task_groups', []):
+            for group_config in task_group_configs:
                 group_id = group_config['group_id']
                 with TaskGroup(
                     group_id=group_id,
@@ -538,38 +667,44 @@ class DAGFactory:
                 ) as task_group:
                     task_groups[group_id] = task_group
             
-            # Create tasks
-            for task_config in config['tasks']:
+            group_of = {
+                task_id: group_config['group_id']
+                for group_config in task_group_configs
+                for task_id in group_config.get('tasks', [])
+            }
+            
+            # Handle asset outputs
+            produced_assets = None
+            if 'assets' in config and 'produces' in config['assets']:
+                produced_assets = self.asset_manager.get_produced_assets(config['assets']['produces'])
+            
+            task_configs = {task_config['task_id']: task_config for task_config in config['tasks']}
+            task_order = _topo_order(config['tasks'])
+            if task_order is None:
+                raise DAGFactoryError("Circular dependencies detected in task graph")
+            
+            # Create, wire and group each task in one pass; dependency order
+            # guarantees upstream tasks already exist
+            for task_id in task_order:
+                task_config = task_configs[task_id]
                 task = self.task_builder.build_task(task_config, default_args)
                 task.dag = dag
-                tasks[task_config['task_id']] = task
+                tasks[task_id] = task
                 
-                # Handle asset outputs
-                if 'assets' in config and 'produces' in config['assets']:
-                    produced_assets = self.asset_manager.get_produced_assets(config['assets']['produces'])
-                    task.outlets = produced_assets
-            
-            # Set up dependencies
-            for task_config in config['tasks']:
-                task_id = task_config['task_id']
-                depends_on = task_config.get('depends_on', [])
+                if produced_assets is not None:
+                    # Each task gets its own list; Airflow extends outlets in place
+                    task.outlets = list(produced_assets)
                 
-                if depends_on:
-                    task = tasks[task_id]
-                    upstream_tasks = [tasks[dep] for dep in depends_on if dep in tasks]
+                upstream_tasks = [tasks[dep] for dep in task_config.get('depends_on', ()) if dep in tasks]
+                if upstream_tasks:
                     task.set_upstream(upstream_tasks)
-            
-            # Assign tasks to task groups
-            for group_config in config.get('task_groups', []):
-                group_id = group_config['group_id']
-                group_tasks = group_config.get('tasks', [])
                 
-                for task_id in group_tasks:
-                    if task_id in tasks:
-                        tasks[task_id].task_group = task_groups[group_id]
+                group_id = group_of.get(task_id)
+                if group_id is not None:
+                    task.task_group = task_groups[group_id]
             
             # Update metrics
-            generation_time = (datetime.now() - start_time).total_seconds()
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e9
             self.generation_metrics['total_dags'] += 1
             self.generation_metrics['successful_generations'] += 1
             self.generation_metrics['total_generation_time'] += generation_time
@@ -590,8 +725,7 @@ class DAGFactory:
             return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         elif date_str.lower().startswith('days_ago('):
             # Extract number from days_ago(n)
-            import re
-            match = re.search(r'days_ago\((\d+)\)', date_str)
+            match = _DAYS_AGO_RE.search(date_str)
             if match:
                 days = int(match.group(1))
                 return days_ago(days)
@@ -617,7 +751,14 @@ class DAGFactory:
             logger.warning(f"Configuration directory not found: {self.config_dir}")
             return dags
         
-        config_files = list(self.config_dir.glob('*.yaml')) + list(self.config_dir.glob('*.yml')) + list(self.config_dir.glob('*.json'))
+        # One directory pass instead of a glob per extension
+        with os.scandir(self.config_dir) as entries:
+            config_files = sorted(
+                Path(entry.path) for entry in entries
+                if not entry.name.startswith('.')
+                and os.path.splitext(entry.name)[1].lower() in _CONFIG_EXTENSIONS
+                and entry.is_file()
+            )
         
         for config_file in config_files:
             try:
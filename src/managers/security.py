@@ -3,21 +3,34 @@ Security features for DAG Factory including encryption, access control, and audi
 """
 
 import os
+import re
+import copy
 import json
 import logging
 import hashlib
 import secrets
+import threading
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import base64
 
-from ..utils import safe_load_yaml_file, safe_save_yaml_file
+from ..utils import safe_load_yaml_file, safe_save_yaml_file, load_yaml_cached, _YamlSafeDumper
 
 try:
-    from cryptography.fernet import Fernet
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
     from cryptography.hazmat.primitives import hashes, serialization
     from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
     CRYPTO_AVAILABLE = True
@@ -69,6 +82,12 @@ class AuditLogEntry:
 class EncryptionManager:
     """Manages encryption/decryption of sensitive configuration data."""
     
+    # Keys containing any of these (case-insensitive) hold values to encrypt
+    _SENSITIVE_RE = re.compile(
+        'password|secret|token|key|credential|connection_string|api_key|private_key',
+        re.IGNORECASE
+    )
+    
     def __init__(self, key_file: str = '.dag_factory_key'):
         if not CRYPTO_AVAILABLE:
             logger.warning("Cryptography not available - encryption disabled")
@@ -101,12 +120,7 @@ class EncryptionManager:
             logger.warning("Encryption not available - returning config unchanged")
             return config
             
-        sensitive_fields = [
-            'password', 'secret', 'token', 'key', 'credential',
-            'connection_string', 'api_key', 'private_key'
-        ]
-        
-        encrypted_config = self._deep_copy_and_encrypt(config, sensitive_fields)
+        encrypted_config = self._deep_copy_and_encrypt(config)
         return encrypted_config
     
     def decrypt_sensitive_data(self, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -114,44 +128,63 @@ class EncryptionManager:
         decrypted_config = self._deep_copy_and_decrypt(config)
         return decrypted_config
     
-    def _deep_copy_and_encrypt(self, obj: Any, sensitive_fields: List[str]) -> Any:
-        """Recursively encrypt sensitive fields."""
-        if isinstance(obj, dict):
-            result = {}
-            for key, value in obj.items():
-                if any(sensitive_field in key.lower() for sensitive_field in sensitive_fields):
-                    if isinstance(value, str):
-                        result[key] = self._encrypt_string(value)
-                    else:
-                        result[key] = value
-                else:
-                    result[key] = self._deep_copy_and_encrypt(value, sensitive_fields)
-            return result
-        elif isinstance(obj, list):
-            return [self._deep_copy_and_encrypt(item, sensitive_fields) for item in obj]
-        else:
+    def _deep_copy_and_encrypt(self, obj: Any) -> Any:
+        """Copy nested dicts/lists, encrypting string values under sensitive keys."""
+        if not isinstance(obj, (dict, list)):
             return obj
+        
+        is_sensitive = self._SENSITIVE_RE.search
+        result = {} if isinstance(obj, dict) else [None] * len(obj)
+        # Each stack entry pairs a source container with its copy
+        stack = [(obj, result)]
+        while stack:
+            source, target = stack.pop()
+            is_dict = isinstance(source, dict)
+            for key, value in (source.items() if is_dict else enumerate(source)):
+                if is_dict and isinstance(key, str) and is_sensitive(key):
+                    # Sensitive non-string values are kept as they are
+                    target[key] = self._encrypt_string(value) if isinstance(value, str) else value
+                elif isinstance(value, dict):
+                    target[key] = child = {}
+                    stack.append((value, child))
+                elif isinstance(value, list):
+                    target[key] = child = [None] * len(value)
+                    stack.append((value, child))
+                else:
+                    target[key] = value
+        return result
     
     def _deep_copy_and_decrypt(self, obj: Any) -> Any:
-        """Recursively decrypt encrypted fields."""
-        if isinstance(obj, dict):
-            result = {}
-            for key, value in obj.items():
-                if isinstance(value, str) and value.startswith('ENCRYPTED:'):
-                    result[key] = self._decrypt_string(value)
-                else:
-                    result[key] = self._deep_copy_and_decrypt(value)
-            return result
-        elif isinstance(obj, list):
-            return [self._deep_copy_and_decrypt(item) for item in obj]
-        else:
+        """Copy nested dicts/lists, decrypting encrypted dict values."""
+        if not isinstance(obj, (dict, list)):
             return obj
+        
+        result = {} if isinstance(obj, dict) else [None] * len(obj)
+        stack = [(obj, result)]
+        while stack:
+            source, target = stack.pop()
+            is_dict = isinstance(source, dict)
+            for key, value in (source.items() if is_dict else enumerate(source)):
+                if isinstance(value, str):
+                    if is_dict and value.startswith('ENCRYPTED:'):
+                        value = self._decrypt_string(value)
+                    target[key] = value
+                elif isinstance(value, dict):
+                    target[key] = child = {}
+                    stack.append((value, child))
+                elif isinstance(value, list):
+                    target[key] = child = [None] * len(value)
+                    stack.append((value, child))
+                else:
+                    target[key] = value
+        return result
     
     def _encrypt_string(self, value: str) -> str:
         """Encrypt a string value."""
         try:
+            # Fernet tokens are already URL-safe base64, so they are stored as-is
             encrypted_bytes = self._fernet.encrypt(value.encode())
-            return f"ENCRYPTED:{base64.b64encode(encrypted_bytes).decode()}"
+            return f"ENCRYPTED:{encrypted_bytes.decode('ascii')}"
         except Exception as e:
             logger.error(f"Failed to encrypt value: {str(e)}")
             raise
@@ -162,9 +195,12 @@ class EncryptionManager:
             if not encrypted_value.startswith('ENCRYPTED:'):
                 return encrypted_value
             
-            encrypted_data = encrypted_value[10:]  # Remove 'ENCRYPTED:' prefix
-            encrypted_bytes = base64.b64decode(encrypted_data.encode())
-            decrypted_bytes = self._fernet.decrypt(encrypted_bytes)
+            token = encrypted_value[10:].encode('ascii')  # Remove 'ENCRYPTED:' prefix
+            try:
+                decrypted_bytes = self._fernet.decrypt(token)
+            except InvalidToken:
+                # Older values wrapped the Fernet token in a second layer of base64
+                decrypted_bytes = self._fernet.decrypt(base64.b64decode(token))
             return decrypted_bytes.decode()
         except Exception as e:
             logger.error(f"Failed to decrypt value: {str(e)}")
@@ -198,6 +234,13 @@ class AccessControlManager:
         self.roles_config_file = Path(roles_config_file)
         self.roles_config = self._load_roles_config()
         self.user_cache = {}
+        
+        # Permission sets are resolved once per role and once per user
+        self._role_permissions = {
+            role_name: frozenset(role_config.get('permissions', ()))
+            for role_name, role_config in self.roles_config.get('roles', {}).items()
+        }
+        self._user_permissions: Dict[str, frozenset] = {}
     
     def _load_roles_config(self) -> Dict[str, Any]:
         """Load roles configuration."""
@@ -227,16 +270,14 @@ class AccessControlManager:
             }
             
             self.roles_config_file.parent.mkdir(parents=True, exist_ok=True)
-            import yaml
             with open(self.roles_config_file, 'w') as f:
-                yaml.dump(default_config, f, default_flow_style=False)
+                yaml.dump(default_config, f, Dumper=_YamlSafeDumper, default_flow_style=False)
             
             return default_config
         
         try:
-            import yaml
-            with open(self.roles_config_file, 'r') as f:
-                return yaml.safe_load(f)
+            # Shared parse result; this manager mutates its copy in add_user
+            return copy.deepcopy(load_yaml_cached(self.roles_config_file))
         except Exception as e:
             logger.error(f"Failed to load roles config: {str(e)}")
             raise
@@ -261,31 +302,24 @@ class AccessControlManager:
         self.user_cache[username] = user
         return user
     
+    def get_permissions(self, username: str) -> frozenset:
+        """Get the combined permissions of all of a user's roles."""
+        permissions = self._user_permissions.get(username)
+        if permissions is None:
+            role_permissions = self._role_permissions
+            permissions = frozenset().union(
+                *(role_permissions.get(role_name, ()) for role_name in self.get_user(username).roles)
+            )
+            self._user_permissions[username] = permissions
+        return permissions
+    
     def check_permission(self, username: str, action: AccessLevel, resource: str = None) -> bool:
         """Check if user has permission for specific action."""
-        user = self.get_user(username)
-        user_permissions = set()
-        
-        # Collect permissions from all user roles
-        for role_name in user.roles:
-            role_config = self.roles_config.get('roles', {}).get(role_name, {})
-            role_permissions = role_config.get('permissions', [])
-            user_permissions.update(role_permissions)
-        
-        # Check if user has required permission
-        required_permission = action.value
-        has_permission = required_permission in user_permissions
+        # Resource-specific permissions are a future enhancement; resource is unused
+        permissions = self.get_permissions(username)
         
         # Admin users have all permissions
-        if 'admin' in user_permissions:
-            has_permission = True
-        
-        # Resource-specific permissions (future enhancement)
-        if resource and not has_permission:
-            # Check for resource-specific permissions
-            pass
-        
-        return has_permission
+        return 'admin' in permissions or action.value in permissions
     
     def require_permission(self, username: str, action: AccessLevel, resource: str = None):
         """Require specific permission or raise exception."""
@@ -302,15 +336,147 @@ class AccessControlManager:
         
         # Clear cache
         self.user_cache.pop(username, None)
+        self._user_permissions.pop(username, None)
         
         # Save updated configuration
         self._save_roles_config()
     
     def _save_roles_config(self):
         """Save roles configuration to file."""
-        import yaml
         with open(self.roles_config_file, 'w') as f:
-            yaml.dump(self.roles_config, f, default_flow_style=False)
+            yaml.dump(self.roles_config, f, Dumper=_YamlSafeDumper, default_flow_style=False)
+
+
+class _AuditFileWriter:
+    """Appends audit lines to a file through a persistent O_APPEND descriptor.
+    
+    Every line goes straight to the kernel with ``os.write``, so nothing is
+    buffered in-process and entries survive ``os._exit`` and forked children.
+    The file is reopened if it has been rotated or deleted since the last write.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._fd = None
+        # (st_dev, st_ino) of the file behind self._fd
+        self._file_id = None
+    
+    def write(self, line: str):
+        """Append a line to the file; the write is complete when this returns."""
+        data = line.encode('utf-8')
+        with self.lock:
+            try:
+                if not self._is_current():
+                    self._open()
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self._fd, view):]
+            except OSError as e:
+                logger.error(f"Failed to write audit log {self.path}: {str(e)}")
+                self._close()
+    
+    def _is_current(self) -> bool:
+        """Check the open descriptor still refers to the file at ``path``.
+        
+        A rotated or deleted log leaves the descriptor on the old inode.
+        """
+        if self._fd is None:
+            return False
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_dev, stat.st_ino) == self._file_id
+    
+    def _open(self):
+        self._close()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        stat = os.fstat(self._fd)
+        self._file_id = (stat.st_dev, stat.st_ino)
+    
+    def _close(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+            self._file_id = None
+
+
+def _iter_lines_reverse(path: Path, block_size: int = 65536):
+    """Yield the raw lines of a file last-to-first, reading fixed-size blocks from the end."""
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line
+        if remainder:
+            yield remainder
+
+
+def _dump_audit_json(log_data: Dict[str, Any]) -> str:
+    """Serialize an audit record, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(log_data, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(log_data)
+
+
+def _json_value_needles(value: str) -> Tuple[bytes, ...]:
+    """Byte forms a string value can take inside a serialized audit record.
+    
+    orjson writes non-ASCII as UTF-8 while json.dumps escapes it, so both
+    encodings are returned; escaping of quotes and control characters matches.
+    """
+    return tuple({
+        json.dumps(value).encode('ascii'),
+        json.dumps(value, ensure_ascii=False).encode('utf-8', 'surrogatepass'),
+    })
+
+
+# One writer per audit file so every AuditLogger on a path shares a descriptor
+_AUDIT_WRITERS: Dict[Path, _AuditFileWriter] = {}
+_AUDIT_WRITERS_LOCK = threading.Lock()
+
+
+def _get_audit_writer(path: Path) -> _AuditFileWriter:
+    key = path.resolve()
+    with _AUDIT_WRITERS_LOCK:
+        writer = _AUDIT_WRITERS.get(key)
+        if writer is None:
+            # Resolved now so a later chdir cannot redirect the lazy open
+            writer = _AUDIT_WRITERS[key] = _AuditFileWriter(key)
+    return writer
+
+
+def _acquire_audit_writers_before_fork():
+    """Wait for in-flight audit writes so a fork never copies a held lock."""
+    _AUDIT_WRITERS_LOCK.acquire()
+    for writer in _AUDIT_WRITERS.values():
+        writer.lock.acquire()
+
+
+def _release_audit_writers_after_fork():
+    for writer in _AUDIT_WRITERS.values():
+        writer.lock.release()
+    _AUDIT_WRITERS_LOCK.release()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(
+        before=_acquire_audit_writers_before_fork,
+        after_in_parent=_release_audit_writers_after_fork,
+        after_in_child=_release_audit_writers_after_fork,
+    )
 
 
 class AuditLogger:
@@ -320,41 +486,28 @@ class AuditLogger:
         self.log_file = Path(log_file)
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Configure audit logger
-        self.audit_logger = logging.getLogger('dag_factory_audit')
-        self.audit_logger.setLevel(logging.INFO)
-        
-        # File handler for audit logs
-        if not self.audit_logger.handlers:
-            handler = logging.FileHandler(self.log_file)
-            formatter = logging.Formatter(
-                '%(asctime)s | %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S UTC'
-            )
-            handler.setFormatter(formatter)
-            self.audit_logger.addHandler(handler)
+        # Entries are appended synchronously through a shared O_APPEND descriptor
+        self._writer = _get_audit_writer(self.log_file)
     
     def log_action(self, user: str, action: AuditAction, resource: str, 
                    details: Dict[str, Any] = None, success: bool = True,
                    ip_address: str = None, user_agent: str = None):
         """Log an audit event."""
-        entry = AuditLogEntry(
-            timestamp=datetime.now(timezone.utc),
-            user=user,
-            action=action,
-            resource=resource,
-            details=details or {},
-            success=success,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        timestamp = datetime.now(timezone.utc)
         
-        # Convert to JSON for structured logging
-        log_data = asdict(entry)
-        log_data['timestamp'] = entry.timestamp.isoformat()
-        log_data['action'] = entry.action.value
+        # Same fields as AuditLogEntry, built directly for structured logging
+        log_data = {
+            'timestamp': timestamp.isoformat(),
+            'user': user,
+            'action': action.value,
+            'resource': resource,
+            'details': details or {},
+            'success': success,
+            'ip_address': ip_address,
+            'user_agent': user_agent
+        }
         
-        self.audit_logger.info(json.dumps(log_data))
+        self._writer.write(f"{timestamp:%Y-%m-%d %H:%M:%S} UTC | {_dump_audit_json(log_data)}\n")
     
     def get_audit_logs(self, user: str = None, action: AuditAction = None, 
                       resource: str = None, limit: int = 100) -> List[AuditLogEntry]:
@@ -364,18 +517,24 @@ class AuditLogger:
         if not self.log_file.exists():
             return logs
         
+        # Cheap substring checks for each filter's JSON-encoded value on the raw
+        # line; only lines containing all of them are decoded and compared exactly
+        needles = [
+            _json_value_needles(value)
+            for value in (user, action and action.value, resource) if value
+        ]
+        
         try:
-            with open(self.log_file, 'r') as f:
-                lines = f.readlines()
-            
-            # Parse logs (most recent first)
-            for line in reversed(lines[-limit*2:]):  # Read more lines to account for filtering
+            # Parse logs (most recent first), reading back from the end only as far as needed
+            for line in _iter_lines_reverse(self.log_file):
                 if len(logs) >= limit:
                     break
+                if not all(any(form in line for form in forms) for forms in needles):
+                    continue
                 
                 try:
                     # Extract JSON from log line
-                    json_part = line.split(' | ', 1)[1].strip()
+                    json_part = line.split(b' | ', 1)[1]
                     log_data = json.loads(json_part)
                     
                     # Apply filters
@@ -399,7 +558,7 @@ class AuditLogger:
                     )
                     logs.append(entry)
                     
-                except (json.JSONDecodeError, KeyError, ValueError):
+                except (json.JSONDecodeError, KeyError, IndexError, ValueError):
                     continue
             
         except Exception as e:
@@ -441,11 +600,9 @@ class SecurityManager:
         self.access_control.require_permission(username, AccessLevel.READ)
         
         try:
-            with open(config_path, 'r') as f:
-                import yaml
-                config = yaml.safe_load(f)
+            config = load_yaml_cached(config_path)
             
-            # Decrypt sensitive data
+            # Decrypt sensitive data (copies the shared parse result)
             decrypted_config = self.encryption_manager.decrypt_sensitive_data(config)
             
             # Log access
@@ -485,17 +642,27 @@ class SecurityManager:
     def get_user_permissions(self, username: str) -> Dict[str, Any]:
         """Get comprehensive user permissions information."""
         user = self.access_control.get_user(username)
-        permissions = set()
-        
-        for role_name in user.roles:
-            role_config = self.access_control.roles_config.get('roles', {}).get(role_name, {})
-            role_permissions = role_config.get('permissions', [])
-            permissions.update(role_permissions)
         
         return {
             'username': user.username,
             'roles': user.roles,
-            'permissions': list(permissions),
+            'permissions': list(self.access_control.get_permissions(username)),
             'email': user.email,
             'department': user.department
         }
+    
+    def get_all_user_permissions(self) -> Dict[str, Dict[str, Any]]:
+        """Get permissions information for every configured user in one pass."""
+        all_permissions = {}
+        for username in self.access_control.roles_config.get('users', {}):
+            user = self.access_control.get_user(username)
+            
+            all_permissions[username] = {
+                'username': user.username,
+                'roles': user.roles,
+                'permissions': list(self.access_control.get_permissions(username)),
+                'email': user.email,
+                'department': user.department
+            }
+        
+        return all_permissions
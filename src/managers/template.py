@@ -7,7 +7,9 @@ Template inheritance and environment configuration management for DAG Factory.
 """
 
 import json
-from typing import Dict, List, Any, Optional
+import os
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
@@ -18,8 +20,8 @@ except ImportError:
     yaml = None
 
 from ..utils import (
-    logger, TemplateInheritanceError, deep_merge_dicts, 
-    set_nested_value, safe_load_yaml_file, detect_environment
+    logger, TemplateInheritanceError, deep_merge_dicts, merge_dicts_shared,
+    with_nested_values, safe_load_yaml_file, load_yaml_cached, detect_environment
 )
 
 
@@ -37,33 +39,69 @@ class TemplateManager:
     
     def __init__(self, templates_dir: str = 'dags/templates'):
         self.templates_dir = Path(templates_dir)
-        self._template_cache = {}
-        self._inheritance_graph = {}
+        # name -> ((path, mtime_ns, size) for the template and each ancestor, resolved template)
+        self._template_cache: Dict[str, Tuple[Tuple[Tuple[Path, int, int], ...], Dict[str, Any]]] = {}
+        # (templates_dir mtime_ns, template name -> file)
+        self._template_index: Optional[Tuple[int, Dict[str, Path]]] = None
+        # Per-thread so concurrent loads sharing a parent aren't mistaken for cycles
+        self._resolution_state = threading.local()
+    
+    @property
+    def _inheritance_graph(self) -> Dict[str, bool]:
+        """Templates currently being resolved by the calling thread."""
+        graph = getattr(self._resolution_state, 'graph', None)
+        if graph is None:
+            graph = self._resolution_state.graph = {}
+        return graph
         
     def load_template(self, template_name: str) -> Dict[str, Any]:
-        """Load a template with inheritance resolution."""
-        if template_name in self._template_cache:
-            return self._template_cache[template_name]
+        """Load a template with inheritance resolution.
         
-        template_path = self.templates_dir / f"{template_name}.yaml"
-        if not template_path.exists():
-            template_path = self.templates_dir / f"{template_name}.yml"
+        Resolved templates are cached until the template or any template it
+        extends changes on disk. The returned dict is shared; do not mutate it.
+        """
+        cached = self._template_cache.get(template_name)
+        if cached is not None and self.signature_is_current(cached[0]):
+            return cached[1]
         
-        if not template_path.exists():
+        template_path = self._template_files().get(template_name)
+        if template_path is None:
             raise TemplateInheritanceError(f"Template '{template_name}' not found in {self.templates_dir}")
         
+        stat = template_path.stat()
         try:
-            with open(template_path, 'r') as f:
-                template_config = yaml.safe_load(f)
+            # Shared with other managers; inheritance resolution only reads it
+            template_config = load_yaml_cached(template_path)
         except yaml.YAMLError as e:
             raise TemplateInheritanceError(f"Failed to parse template '{template_name}': {str(e)}")
         
-        # Resolve inheritance
+        # Resolve inheritance; the parent chain's signature is cached by now
         resolved_template = self._resolve_inheritance(template_name, template_config)
-        self._template_cache[template_name] = resolved_template
+        signature = ((template_path, stat.st_mtime_ns, stat.st_size),)
+        extends = template_config.get('template', {}).get('extends')
+        if extends:
+            signature += self._template_cache[extends][0]
+        self._template_cache[template_name] = (signature, resolved_template)
         
         return resolved_template
     
+    def template_signature(self, template_name: str) -> Tuple[Tuple[Path, int, int], ...]:
+        """Files, with mtime and size, behind the last load of a template and its ancestors."""
+        cached = self._template_cache.get(template_name)
+        return cached[0] if cached is not None else ()
+    
+    @staticmethod
+    def signature_is_current(signature: Tuple[Tuple[Path, int, int], ...]) -> bool:
+        """Check that every file in a cached inheritance chain still has the same mtime and size."""
+        for path, mtime_ns, size in signature:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                return False
+        return True
+    
     def _resolve_inheritance(self, template_name: str, template_config: Dict[str, Any]) -> Dict[str, Any]:
         """Resolve template inheritance chain."""
         # Check for circular dependencies
@@ -80,9 +118,10 @@ class TemplateManager:
                 # Load parent template
                 parent_template = self.load_template(extends)
                 
-                # Deep merge parent with current template
-                merged_template = deep_merge_dicts(parent_template, template_config, 
-                                                 merge_lists=True, skip_keys=['template'])
+                # Merge parent with current template; the cached parent is shared,
+                # not copied, so each level only rebuilds the paths it overrides
+                merged_template = merge_dicts_shared(parent_template, template_config,
+                                                     merge_lists=True, skip_keys=['template'])
                 
                 # Apply overrides if specified
                 overrides = template_meta.get('overrides', {})
@@ -98,24 +137,32 @@ class TemplateManager:
             self._inheritance_graph.pop(template_name, None)
     
     def _apply_overrides(self, template: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply specific overrides to template."""
-        import copy
-        result = copy.deepcopy(template)
-        
-        for key_path, value in overrides.items():
-            set_nested_value(result, key_path, value)
+        """Apply specific overrides to template, copying only the overridden paths."""
+        return with_nested_values(template, overrides)
+    
+    def _template_files(self) -> Dict[str, Path]:
+        """Map template names to their files, rescanning only when the directory changes."""
+        try:
+            dir_mtime = os.stat(self.templates_dir).st_mtime_ns
+        except OSError:
+            return {}
         
-        return result
+        index = self._template_index
+        if index is None or index[0] != dir_mtime:
+            templates = {}
+            with os.scandir(self.templates_dir) as entries:
+                for entry in entries:
+                    name, _, suffix = entry.name.rpartition('.')
+                    if name and suffix in ('yaml', 'yml') and entry.is_file():
+                        # A .yaml file takes precedence over a .yml one of the same name
+                        if suffix == 'yaml' or name not in templates:
+                            templates[name] = Path(entry.path)
+            index = self._template_index = (dir_mtime, templates)
+        return index[1]
     
     def list_available_templates(self) -> List[str]:
         """List all available templates."""
-        templates = []
-        if self.templates_dir.exists():
-            for file_path in self.templates_dir.glob('*.yaml'):
-                templates.append(file_path.stem)
-            for file_path in self.templates_dir.glob('*.yml'):
-                templates.append(file_path.stem)
-        return templates
+        return list(self._template_files())
     
     def validate_template(self, template_name: str) -> bool:
         """Validate a template can be loaded without errors."""
@@ -133,8 +180,10 @@ class EnvironmentManager:
         self.current_environment = detect_environment()
     
     def apply_environment_overrides(self, config: Dict[str, Any], target_env: Optional[str] = None) -> Dict[str, Any]:
-        """Apply environment-specific overrides to configuration."""
-        import copy
+        """Apply environment-specific overrides to configuration.
+        
+        The result shares untouched subtrees with ``config``.
+        """
         environment = target_env or self.current_environment
         
         if 'environments' not in config:
@@ -146,11 +195,10 @@ class EnvironmentManager:
             return config
         
         # Remove environments section from final config
-        result = copy.deepcopy(config)
-        result.pop('environments', None)
+        result = {key: value for key, value in config.items() if key != 'environments'}
         
         # Apply environment-specific overrides (lists are replaced, not merged)
-        result = deep_merge_dicts(result, env_overrides, merge_lists=False)
+        result = merge_dicts_shared(result, env_overrides, merge_lists=False)
         
         logger.info(f"Applied environment overrides for '{environment}'")
         return result
@@ -13,7 +13,7 @@ import uuid
 
 from .utils import (
     logger, validate_dag_id, safe_load_yaml_file, safe_save_yaml_file,
-    SUPPORTED_OPERATORS, DAG_ID_PREFIXES
+    SUPPORTED_OPERATORS, DAG_ID_PREFIXES, _YamlSafeDumper
 )
 from .managers.template import ConfigurationComposer, TemplateManager, EnvironmentManager
 from .managers.security import SecurityManager, AccessLevel, AuditAction
@@ -168,7 +168,7 @@ class ConfigurationAPI:
                 config_path = self.config_dir / config_filename
                 
                 with open(config_path, 'w') as f:
-                    yaml.dump(secured_config, f, default_flow_style=False)
+                    yaml.dump(secured_config, f, Dumper=_YamlSafeDumper, default_flow_style=False)
                 
                 return jsonify({
                     'message': 'Configuration created successfully',
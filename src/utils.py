@@ -6,11 +6,22 @@ DAG Factory modules to eliminate code duplication.
 """
 
 import copy
+import functools
 import os
 import re
 import logging
+from pathlib import Path
 from typing import Dict, List, Any, Optional, Union
 
+try:
+    import yaml
+    # libyaml-backed loader/dumper when PyYAML was built with it; shared by
+    # every module that reads or writes YAML
+    _YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    _YamlSafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+except ImportError:
+    yaml = _YamlSafeLoader = _YamlSafeDumper = None
+
 
 # Logger setup
 logger = logging.getLogger(__name__)
@@ -67,9 +78,68 @@ def deep_merge_dicts(base: Dict[str, Any], override: Dict[str, Any],
     return result
 
 
+_ENV_VAR_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+
+def _replace_env_var(match: 're.Match') -> str:
+    """Resolve a single ``${VAR}`` or ``${VAR:-default}`` expression."""
+    var_expr = match.group(1)
+    if ':-' in var_expr:
+        var_name, default_value = var_expr.split(':-', 1)
+        return os.getenv(var_name, default_value)
+    value = os.getenv(var_expr)
+    if value is None:
+        raise ConfigurationError(f"Environment variable '{var_expr}' not found")
+    return value
+
+
+def _substitute_in_string(value: str) -> str:
+    """Substitute environment variables in one string."""
+    if '${' not in value:
+        return value
+    return _ENV_VAR_PATTERN.sub(_replace_env_var, value)
+
+
+def merge_dicts_shared(base: Dict[str, Any], override: Dict[str, Any],
+                       merge_lists: bool = True, skip_keys: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Deep merge two dictionaries like deep_merge_dicts, without copying.
+    
+    Only dictionaries on paths the override touches are rebuilt; every other
+    value is shared with ``base`` or ``override``. Copy the result before
+    mutating it.
+    
+    Args:
+        base: Base dictionary to merge into
+        override: Dictionary with override values
+        merge_lists: If True, append lists; if False, replace lists
+        skip_keys: Keys to skip during merging
+    
+    Returns:
+        Merged dictionary
+    """
+    result = dict(base)
+    
+    for key, value in override.items():
+        if skip_keys and key in skip_keys:
+            continue
+        
+        if key in result:
+            current = result[key]
+            if isinstance(current, dict) and isinstance(value, dict):
+                result[key] = merge_dicts_shared(current, value, merge_lists, skip_keys)
+                continue
+            if merge_lists and isinstance(current, list) and isinstance(value, list):
+                result[key] = current + value
+                continue
+        result[key] = value
+    
+    return result
+
+
 def substitute_env_vars(obj: Any) -> Any:
     """
-    Recursively substitute environment variables in strings.
+    Substitute environment variables in strings, walking nested dicts and lists.
     
     Supports patterns like:
     - ${VAR}: Required variable
@@ -79,28 +149,33 @@ def substitute_env_vars(obj: Any) -> Any:
         obj: Object to process (can be dict, list, string, etc.)
         
     Returns:
-        Object with environment variables substituted
+        Object with environment variables substituted; containers are copied,
+        the input is left unchanged
     """
     if isinstance(obj, str):
-        # Pattern: ${VAR} or ${VAR:-default}
-        def replace_env_var(match):
-            var_expr = match.group(1)
-            if ':-' in var_expr:
-                var_name, default_value = var_expr.split(':-', 1)
-                return os.getenv(var_name, default_value)
-            else:
-                value = os.getenv(var_expr)
-                if value is None:
-                    raise ConfigurationError(f"Environment variable '{var_expr}' not found")
-                return value
-        
-        return re.sub(r'\$\{([^}]+)\}', replace_env_var, obj)
-    elif isinstance(obj, dict):
-        return {k: substitute_env_vars(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [substitute_env_vars(item) for item in obj]
-    else:
+        return _substitute_in_string(obj)
+    if not isinstance(obj, (dict, list)):
         return obj
+    
+    # Iterative walk: each stack entry pairs a source container with its copy
+    result = {} if isinstance(obj, dict) else [None] * len(obj)
+    stack = [(obj, result)]
+    while stack:
+        source, target = stack.pop()
+        items = source.items() if isinstance(source, dict) else enumerate(source)
+        for key, value in items:
+            if isinstance(value, str):
+                target[key] = _substitute_in_string(value)
+            elif isinstance(value, dict):
+                child = target[key] = {}
+                stack.append((value, child))
+            elif isinstance(value, list):
+                child = target[key] = [None] * len(value)
+                stack.append((value, child))
+            else:
+                target[key] = value
+    
+    return result
 
 
 def set_nested_value(obj: Dict[str, Any], key_path: str, value: Any) -> None:
@@ -123,6 +198,43 @@ def set_nested_value(obj: Dict[str, Any], key_path: str, value: Any) -> None:
     current[keys[-1]] = value
 
 
+def with_nested_values(obj: Dict[str, Any], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of ``obj`` with dot-notation paths set, as set_nested_value would.
+    
+    Only the containers along each path are copied; everything else is
+    shared with ``obj``, which is left unchanged.
+    
+    Args:
+        obj: Dictionary to start from
+        values: Mapping of dot-separated paths to values
+        
+    Returns:
+        Updated dictionary
+    """
+    result = dict(obj)
+    # Containers created by this call, which can be written to in place
+    fresh = {id(result)}
+    
+    for key_path, value in values.items():
+        keys = key_path.split('.')
+        current = result
+        
+        for key in keys[:-1]:
+            if key not in current:
+                child = current[key] = {}
+            else:
+                child = current[key]
+                if id(child) not in fresh:
+                    child = current[key] = copy.copy(child)
+            fresh.add(id(child))
+            current = child
+        
+        current[keys[-1]] = value
+    
+    return result
+
+
 def get_nested_value(obj: Dict[str, Any], key_path: str, default: Any = None) -> Any:
     """
     Get nested dictionary value using dot notation.
@@ -160,10 +272,8 @@ def safe_load_yaml_file(file_path: str) -> Dict[str, Any]:
         ConfigurationError: If file cannot be loaded
     """
     try:
-        import yaml
-        
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = yaml.safe_load(f)
+            content = yaml.load(f, Loader=_YamlSafeLoader)
             
         if content is None:
             return {}
@@ -178,6 +288,29 @@ def safe_load_yaml_file(file_path: str) -> Dict[str, Any]:
         raise ConfigurationError(f"Error loading {file_path}: {e}")
 
 
+@functools.lru_cache(maxsize=128)
+def _parse_yaml_cached(path: str, mtime_ns: int, size: int) -> Any:
+    """Parse a YAML file; ``mtime_ns`` and ``size`` only key the cache."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YamlSafeLoader)
+
+
+def load_yaml_cached(file_path: Union[str, Path]) -> Any:
+    """
+    Load a YAML file, parsing it again only when its mtime or size changes.
+    
+    The parsed object is shared by every caller; deep-copy it before mutating.
+    
+    Args:
+        file_path: Path to YAML file
+        
+    Returns:
+        Parsed YAML content (None for an empty file)
+    """
+    stat = os.stat(file_path)
+    return _parse_yaml_cached(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
 def safe_save_yaml_file(file_path: str, data: Dict[str, Any]) -> None:
     """
     Safely save data to YAML file.
@@ -190,12 +323,10 @@ def safe_save_yaml_file(file_path: str, data: Dict[str, Any]) -> None:
         ConfigurationError: If file cannot be saved
     """
     try:
-        import yaml
-        
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
         with open(file_path, 'w', encoding='utf-8') as f:
-            yaml.safe_dump(data, f, default_flow_style=False, indent=2)
+            yaml.dump(data, f, Dumper=_YamlSafeDumper, default_flow_style=False, indent=2)
             
     except Exception as e:
         raise ConfigurationError(f"Error saving {file_path}: {e}")
@@ -3,6 +3,8 @@ Tests for DAG Factory implementation.
 Run with: pytest test_dag_factory.py -v
 """
 
+import os
+import copy
 import pytest
 import tempfile
 import yaml
@@ -18,6 +20,10 @@ from src.dag_factory import (
     DAGFactoryError,
     ValidationResult
 )
+from src.managers import security
+from src.managers.security import AuditLogger, AuditAction, _iter_lines_reverse
+from src import cli
+from src.utils import deep_merge_dicts, merge_dicts_shared, set_nested_value, with_nested_values
 
 class TestOperatorRegistry:
     
@@ -113,6 +119,35 @@ class TestConfigurationValidator:
         result = validator.validate_config(config)
         assert not result.is_valid
         assert any("Circular dependencies" in error for error in result.errors)
+    
+    @pytest.mark.parametrize("config", [
+        {"dag_id": "etl_valid", "schedule": "@daily",
+         "tasks": [{"task_id": "start", "operator": "dummy", "parameters": {}}]},
+        {"dag_id": "test_dag"},
+        {"dag_id": "bad id!", "schedule": "@daily",
+         "tasks": [{"task_id": "start", "operator": "dummy", "parameters": {}}]},
+        {"dag_id": "etl_valid", "schedule": "@daily", "max_active_runs": "one",
+         "tasks": [{"task_id": "start", "operator": "dummy", "parameters": {}}]},
+        {"dag_id": "etl_valid", "schedule": "@daily", "tasks": [{"operator": "dummy"}]},
+    ])
+    def test_fast_schema_path_matches_jsonschema(self, monkeypatch, config):
+        """Test the fastjsonschema pre-check gives the same result as jsonschema alone."""
+        pytest.importorskip("fastjsonschema")
+        from src import dag_factory
+        
+        validator = ConfigurationValidator(OperatorRegistry())
+        fast_validator = dag_factory._compile_fast_validator(dag_factory.CONFIG_SCHEMA)
+        
+        monkeypatch.setattr(dag_factory, '_FAST_SCHEMA_VALIDATOR', fast_validator)
+        fast_result = validator.validate_config(config)
+        monkeypatch.setattr(dag_factory, '_FAST_SCHEMA_VALIDATOR', None)
+        slow_result = validator.validate_config(config)
+        
+        assert fast_result == slow_result
+        schema_valid = not any(e.startswith("Schema validation error") for e in slow_result.errors)
+        assert fast_validator is not None
+        monkeypatch.setattr(dag_factory, '_FAST_SCHEMA_VALIDATOR', fast_validator)
+        assert validator._passes_fast_schema_check(config) is schema_valid
 
 class TestDAGFactory:
     
@@ -240,5 +275,282 @@ class TestDAGFactory:
         assert metrics['success_rate'] == 1.0
         assert metrics['average_generation_time'] > 0
 
+
+def _write_yaml(path, data):
+    """Write YAML and move the mtime forward so cache signatures always change."""
+    existed = path.exists()
+    previous_mtime = path.stat().st_mtime_ns if existed else 0
+    path.write_text(yaml.dump(data))
+    if existed:
+        mtime = previous_mtime + 1_000_000_000
+        os.utime(path, ns=(mtime, mtime))
+
+
+class TestMergeHelpers:
+    
+    BASE = {
+        "owner": "base",
+        "template": {"extends": "root"},
+        "default_args": {"retries": 1, "email": ["a@example.com"], "nested": {"x": 1}},
+        "tags": ["etl"],
+    }
+    OVERRIDE = {
+        "owner": "child",
+        "template": {"extends": "base"},
+        "default_args": {"retries": 3, "email": ["b@example.com"], "nested": {"y": 2}},
+        "tags": ["daily"],
+        "schedule": "@daily",
+    }
+    
+    @pytest.mark.parametrize("merge_lists", [True, False])
+    def test_merge_dicts_shared_matches_deep_merge(self, merge_lists):
+        """Test the sharing merge produces the same result as deep_merge_dicts."""
+        base, override = copy.deepcopy(self.BASE), copy.deepcopy(self.OVERRIDE)
+        
+        shared = merge_dicts_shared(base, override, merge_lists=merge_lists, skip_keys=['template'])
+        copied = deep_merge_dicts(base, override, merge_lists=merge_lists, skip_keys=['template'])
+        
+        assert shared == copied
+        assert base == self.BASE and override == self.OVERRIDE
+    
+    def test_with_nested_values_matches_set_nested_value(self):
+        """Test with_nested_values matches set_nested_value without touching its input."""
+        values = {
+            "default_args.retries": 5,
+            "default_args.nested.z": 3,
+            "schedule": "@hourly",
+            "new.path.value": True,
+        }
+        expected = copy.deepcopy(self.BASE)
+        for key_path, value in values.items():
+            set_nested_value(expected, key_path, value)
+        
+        source = copy.deepcopy(self.BASE)
+        result = with_nested_values(source, values)
+        
+        assert result == expected
+        assert source == self.BASE
+        # Untouched branches are shared rather than copied
+        assert result['tags'] is source['tags']
+
+
+class TestConfigCache:
+    
+    def _make_factory(self, tmp_path):
+        templates_dir = tmp_path / 'templates'
+        templates_dir.mkdir()
+        _write_yaml(templates_dir / 'base.yaml', {"owner": "base_owner", "retries": 1})
+        _write_yaml(templates_dir / 'child.yaml', {
+            "template": {"extends": "base"},
+            "retries": 2
+        })
+        config_path = tmp_path / 'dag.yaml'
+        _write_yaml(config_path, {
+            "dag_id": "cached_dag",
+            "schedule": "@daily",
+            "template": {"extends": "child"},
+            "tasks": [{"task_id": "start", "operator": "dummy", "parameters": {}}]
+        })
+        factory = DAGFactory(config_dir=str(tmp_path), templates_dir=str(templates_dir))
+        return factory, templates_dir, config_path
+    
+    def test_mutating_returned_config_does_not_leak(self, tmp_path):
+        """Test each load returns a private copy of the cached configuration."""
+        factory, _, config_path = self._make_factory(tmp_path)
+        
+        config = factory.load_config(config_path)
+        config['owner'] = 'mutated'
+        config['tasks'][0]['parameters']['injected'] = True
+        
+        reloaded = factory.load_config(config_path)
+        assert reloaded['owner'] == 'base_owner'
+        assert reloaded['tasks'][0]['parameters'] == {}
+    
+    def test_config_edit_invalidates_cache(self, tmp_path):
+        """Test an edited configuration file is recomposed on the next load."""
+        factory, _, config_path = self._make_factory(tmp_path)
+        assert factory.load_config(config_path)['schedule'] == '@daily'
+        
+        _write_yaml(config_path, {
+            "dag_id": "cached_dag",
+            "schedule": "@hourly",
+            "template": {"extends": "child"},
+            "tasks": [{"task_id": "start", "operator": "dummy", "parameters": {}}]
+        })
+        assert factory.load_config(config_path)['schedule'] == '@hourly'
+    
+    def test_base_template_edit_invalidates_cache(self, tmp_path):
+        """Test editing an ancestor template is picked up by configs extending its children."""
+        factory, templates_dir, config_path = self._make_factory(tmp_path)
+        config = factory.load_config(config_path)
+        assert (config['owner'], config['retries']) == ('base_owner', 2)
+        
+        _write_yaml(templates_dir / 'base.yaml', {"owner": "new_owner", "retries": 1})
+        config = factory.load_config(config_path)
+        assert (config['owner'], config['retries']) == ('new_owner', 2)
+    
+    def test_child_template_edit_invalidates_cache(self, tmp_path):
+        """Test editing the directly extended template is picked up on the next load."""
+        factory, templates_dir, config_path = self._make_factory(tmp_path)
+        assert factory.load_config(config_path)['retries'] == 2
+        
+        _write_yaml(templates_dir / 'child.yaml', {
+            "template": {"extends": "base"},
+            "retries": 5
+        })
+        assert factory.load_config(config_path)['retries'] == 5
+
+
+class TestValidateBatch:
+    
+    def _write_configs(self, tmp_path):
+        valid = tmp_path / 'valid.yaml'
+        valid.write_text(yaml.dump({
+            "dag_id": "batch_valid_dag",
+            "schedule": "@daily",
+            "tasks": [{"task_id": "start", "operator": "dummy", "parameters": {}}]
+        }))
+        invalid = tmp_path / 'invalid.yaml'
+        invalid.write_text(yaml.dump({"dag_id": "batch_invalid_dag"}))
+        return [str(valid), str(invalid), str(valid)]
+    
+    def test_jobs_output_matches_sequential(self, tmp_path, capsys):
+        """Test --jobs prints the same report, in input order, and exit code as a sequential run."""
+        config_files = self._write_configs(tmp_path)
+        common = ['--config-dir', str(tmp_path), '--templates-dir', str(tmp_path)]
+        
+        sequential_code = cli.main(['validate-batch', *config_files, *common])
+        sequential_output = capsys.readouterr().out
+        parallel_code = cli.main(['validate-batch', *config_files, *common, '--jobs', '2'])
+        parallel_output = capsys.readouterr().out
+        
+        assert sequential_code == parallel_code == 1
+        assert parallel_output == sequential_output
+        assert "Validated 3 configurations: 2 valid, 1 invalid" in sequential_output
+    
+    def test_all_valid_exits_zero(self, tmp_path, capsys):
+        """Test a batch with only valid configurations succeeds."""
+        valid = self._write_configs(tmp_path)[0]
+        common = ['--config-dir', str(tmp_path), '--templates-dir', str(tmp_path)]
+        
+        assert cli.main(['validate-batch', valid, valid, *common, '--jobs', '2']) == 0
+        assert "2 valid, 0 invalid" in capsys.readouterr().out
+
+
+class TestAuditLogger:
+    
+    def test_entry_written_before_log_action_returns(self, tmp_path):
+        """Test audit entries reach the file without an explicit flush."""
+        log_file = tmp_path / 'audit.log'
+        audit = AuditLogger(str(log_file))
+        audit.log_action('alice', AuditAction.CREATE, 'dag_a')
+        
+        assert 'dag_a' in log_file.read_text()
+    
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+    def test_entries_survive_fork_and_os_exit(self, tmp_path):
+        """Test entries logged in a forked child that leaves via os._exit are kept."""
+        log_file = tmp_path / 'audit.log'
+        audit = AuditLogger(str(log_file))
+        audit.log_action('parent', AuditAction.CREATE, 'dag_parent')
+        
+        pid = os.fork()
+        if pid == 0:
+            try:
+                audit.log_action('child', AuditAction.UPDATE, 'dag_child')
+            finally:
+                os._exit(0)
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        
+        logs = audit.get_audit_logs()
+        assert [log.user for log in logs] == ['child', 'parent']
+    
+    @pytest.mark.parametrize("rotate", ['rename', 'delete'])
+    def test_entries_follow_rotated_log(self, tmp_path, rotate):
+        """Test writes go to a fresh file after the log is rotated or deleted."""
+        log_file = tmp_path / 'audit.log'
+        audit = AuditLogger(str(log_file))
+        audit.log_action('alice', AuditAction.CREATE, 'before_rotation')
+        
+        if rotate == 'rename':
+            log_file.rename(tmp_path / 'audit.log.1')
+            assert 'before_rotation' in (tmp_path / 'audit.log.1').read_text()
+        else:
+            log_file.unlink()
+        audit.log_action('alice', AuditAction.CREATE, 'after_rotation')
+        
+        assert [log.resource for log in audit.get_audit_logs()] == ['after_rotation']
+    
+    def test_relative_path_ignores_later_chdir(self, tmp_path, monkeypatch):
+        """Test a relative log path is fixed when the logger is created, not on first write."""
+        (tmp_path / 'first').mkdir()
+        (tmp_path / 'second').mkdir()
+        monkeypatch.chdir(tmp_path / 'first')
+        audit = AuditLogger('relative_audit.log')
+        
+        monkeypatch.chdir(tmp_path / 'second')
+        audit.log_action('alice', AuditAction.READ, 'dag_a')
+        
+        assert (tmp_path / 'first' / 'relative_audit.log').exists()
+        assert not (tmp_path / 'second' / 'relative_audit.log').exists()
+    
+    @pytest.mark.parametrize("content", [
+        b"",
+        b"only\n",
+        b"no trailing newline",
+        b"first\nsecond\n\nthird\n",
+        b"a long line that spans blocks\nshort\nanother long line\n",
+    ])
+    @pytest.mark.parametrize("block_size", [1, 4, 65536])
+    def test_iter_lines_reverse(self, tmp_path, content, block_size):
+        """Test reverse iteration matches reversed forward lines for any block size."""
+        path = tmp_path / 'lines.log'
+        path.write_bytes(content)
+        
+        expected = [line for line in content.split(b'\n') if line][::-1]
+        assert list(_iter_lines_reverse(path, block_size=block_size)) == expected
+    
+    @pytest.mark.parametrize("user, resource", [
+        ('o\'brien "ob"', 'C:\\dags\\etl\tdaily'),
+        ('jos\u00e9', 'r\u00e9sum\u00e9_dag'),
+        ('\u7528\u6237', 'dag_\U0001F680'),
+    ])
+    def test_filter_escaped_and_non_ascii_values(self, tmp_path, user, resource):
+        """Test filters match values that are escaped or non-ASCII in the serialized line."""
+        audit = AuditLogger(str(tmp_path / 'audit.log'))
+        audit.log_action(user, AuditAction.DEPLOY, resource, details={'note': user})
+        audit.log_action('other', AuditAction.DEPLOY, 'other_dag')
+        
+        logs = audit.get_audit_logs(user=user, resource=resource)
+        assert [(log.user, log.resource, log.details) for log in logs] == [(user, resource, {'note': user})]
+    
+    def test_filtered_logs_most_recent_first(self, tmp_path):
+        """Test filters combine and results come newest first, up to the limit."""
+        audit = AuditLogger(str(tmp_path / 'audit.log'))
+        for i in range(5):
+            audit.log_action('alice', AuditAction.CREATE, f'dag_{i}')
+            audit.log_action('bob', AuditAction.UPDATE, f'dag_{i}')
+        
+        logs = audit.get_audit_logs(user='alice', limit=3)
+        assert [log.resource for log in logs] == ['dag_4', 'dag_3', 'dag_2']
+        
+        logs = audit.get_audit_logs(action=AuditAction.UPDATE, resource='dag_1')
+        assert [(log.user, log.resource) for log in logs] == [('bob', 'dag_1')]
+        
+        # A value appearing in another field does not match the filter
+        assert audit.get_audit_logs(user='dag_1') == []
+    
+    def test_filter_matches_either_serializer(self, tmp_path, monkeypatch):
+        """Test the pre-filter matches lines written by orjson and by the json fallback."""
+        audit = AuditLogger(str(tmp_path / 'audit.log'))
+        audit.log_action('jos\u00e9', AuditAction.READ, 'dag_\u00e9')
+        monkeypatch.setattr(security, 'orjson', None)
+        audit.log_action('jos\u00e9', AuditAction.READ, 'dag_\u00e9', details={'fallback': True})
+        
+        logs = audit.get_audit_logs(user='jos\u00e9', resource='dag_\u00e9')
+        assert [log.details for log in logs] == [{'fallback': True}, {}]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file